@@ -1,5 +1,6 @@
 import os
-from typing import Optional
+import json
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,26 +16,126 @@ REDIS_HOST: str = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT: int = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB: int = int(os.getenv("REDIS_DB", 0))
 CACHE_TTL: int = 600  # 10 минут
+ANSWER_LOCAL_CACHE_SIZE: int = 1024
+ANSWER_POPULARITY_SIZE: int = 1024  # сколько разных вопросов считаем для прогрева популярных
 
 # URLs
 ITMO_NEWS_RSS: str = "https://news.itmo.ru/ru/news/rss/"
 ITMO_MAIN_URL: str = "https://itmo.ru"
 
+# News aggregation settings
+# Источники задаются JSON-списком в NEWS_SOURCES: [{"name": ..., "url": ..., "interval": секунды}]
+NEWS_DEFAULT_INTERVAL: int = 300
+NEWS_SOURCES: List[Dict[str, Any]] = json.loads(os.getenv("NEWS_SOURCES", "null")) or [
+    {"name": "itmo_news", "url": ITMO_NEWS_RSS, "interval": NEWS_DEFAULT_INTERVAL}
+]
+NEWS_MAX_BACKOFF: int = 3600
+NEWS_STORE_SIZE: int = 200
+NEWS_DEDUP_SIZE: int = 5000
+NEWS_CONTEXT_ITEMS: int = 5
+
 # Model settings
 YC_GPT_MODEL: str = "yandexgpt-lite"
 MAX_TOKENS: int = 1000
 TEMPERATURE: float = 0.7
 GPT_TIMEOUT: int = 60  
 
+# Answer validation settings
+ANSWER_MIN_CONFIDENCE: float = 0.5  # ниже этого порога делаем короткий повторный запрос
+REASK_CONTEXT_CHARS: int = 1500
+REASK_MAX_TOKENS: int = 200
+REASK_MIN_BUDGET: float = 5.0  # минимальный остаток времени, при котором имеет смысл повторный запрос
+
 # Search settings
 MAX_SEARCH_RESULTS: int = 3
 SEARCH_TIMEOUT: int = 20  
+SEARCH_CACHE_TTL: int = 6 * 3600  # результаты поиска живут дольше ответов
+SEARCH_STALE_TTL: int = 3 * 24 * 3600  # сколько ещё хранить устаревшие результаты на случай исчерпания квоты
+SEARCH_LOCAL_CACHE_SIZE: int = 512
+SEARCH_DAILY_QUOTA: int = int(os.getenv("SEARCH_DAILY_QUOTA", 100))
+SEARCH_QUOTA_RESERVE: int = int(os.getenv("SEARCH_QUOTA_RESERVE", 10))  # остаток квоты, при котором предпочитаем кэш
+SEARCH_QUOTA_UTC_OFFSET: int = -8  # квота Google CSE сбрасывается в полночь по тихоокеанскому времени
+
+# Page enrichment settings
+ENRICH_TOP_K: int = 3  # сколько страниц из выдачи скачивать
+ENRICH_MAX_CONCURRENCY: int = 8
+ENRICH_PER_HOST: int = 2
+ENRICH_MAX_BYTES: int = 512 * 1024
+ENRICH_FETCH_TIMEOUT: int = 10
+ENRICH_CUTOFF: float = 4.0  # сколько ждать страницы внутри запроса
+ENRICH_CHUNK_CHARS: int = 800
+ENRICH_PASSAGES_PER_PAGE: int = 2
+ENRICH_CACHE_TTL: int = 3600
+ENRICH_CACHE_SIZE: int = 256
+ENRICH_PREFETCH_INTERVAL: int = 600
+ENRICH_PREFETCH_TOP: int = 20
 
 # Timeouts (in seconds)
 HTTP_TIMEOUT: int = 20
-FASTAPI_TIMEOUT: int = 90
+FASTAPI_TIMEOUT: int = 90  # дедлайн запроса по умолчанию
+REQUEST_MAX_TIMEOUT: int = 400  # верхняя граница дедлайна из заголовка X-Request-Timeout
+GPT_MIN_BUDGET: float = 20.0  # время, которое оставляем на вызов модели после сбора контекста
+GPT_BUDGET_FRACTION: float = 0.6  # при коротком дедлайне резерв на модель - не больше этой доли бюджета
+DEADLINE_MARGIN: float = 1.0  # запас на формирование и отправку ответа
 REDIS_TIMEOUT: int = 2
 
+# Semantic retrieval settings
+SEMANTIC_ENABLED: bool = os.getenv("SEMANTIC_ENABLED", "true").lower() == "true"
+SEMANTIC_MODEL: Optional[str] = os.getenv("SEMANTIC_MODEL")  # модель sentence-transformers; без неё - хеширующий векторизатор
+SEMANTIC_DIM: int = 1024
+SEMANTIC_MAX_PASSAGES: int = 5000
+SEMANTIC_MAX_QUESTIONS: int = 2000
+SEMANTIC_TOP_K: int = 3
+SEMANTIC_MIN_SCORE: float = 0.3  # минимальная близость фрагмента, чтобы добавить его в контекст
+SEMANTIC_DUP_THRESHOLD: float = 0.8  # близость, начиная с которой вопрос считается повтором
+
+# Warm-up settings
+# Файл с заранее известными вопросами: .json (список строк или объектов с "query"),
+# .py (списки в переменных модуля) или текст, где вопросы разделены пустой строкой
+WARMUP_FILE: Optional[str] = os.getenv("WARMUP_FILE")
+# Окна пиковой нагрузки "ЧЧ:ММ-ЧЧ:ММ" через запятую, по времени WARMUP_UTC_OFFSET; пусто - всегда
+WARMUP_WINDOWS: str = os.getenv("WARMUP_WINDOWS", "")
+WARMUP_UTC_OFFSET: int = 3
+WARMUP_LEAD: int = 1800  # за сколько секунд до начала окна начинаем прогрев
+WARMUP_CHECK_INTERVAL: int = 60
+WARMUP_CONCURRENCY: int = int(os.getenv("WARMUP_CONCURRENCY", 2))
+WARMUP_CACHE_TTL: int = 3600  # известные вопросы меняются редко, храним их дольше обычных ответов
+WARMUP_REFRESH_BEFORE: int = 300  # обновляем ответ, если до истечения TTL осталось меньше
+WARMUP_HOT_LIMIT: int = 50  # сколько популярных вопросов из кэша держать прогретыми
+WARMUP_TIMEOUT: int = 120
+WARMUP_TENANT: str = "warmup"
+
+# Rate limiting settings
+RATE_LIMIT_RATE: float = float(os.getenv("RATE_LIMIT_RATE", 2))  # запросов в секунду на клиента
+RATE_LIMIT_BURST: float = float(os.getenv("RATE_LIMIT_BURST", 20))
+# Индивидуальные лимиты и веса: {"<API-ключ или id клиента>": {"rate": ..., "burst": ..., "weight": ...}}
+# Прогрев по умолчанию идёт медленно и с низким весом, чтобы не мешать живым запросам
+TENANT_LIMITS: Dict[str, Dict[str, float]] = {
+    WARMUP_TENANT: {"rate": 0.5, "burst": 2, "weight": 0.25},
+    **json.loads(os.getenv("TENANT_LIMITS", "{}"))
+}
+MAX_QUEUED_PER_TENANT: int = 32
+RETRY_AFTER_BUSY: int = 5  # Retry-After при переполненной очереди, секунды
+
+# Response compression settings
+COMPRESSION_MIN_SIZE: int = 4096  # ответы меньше этого размера не сжимаем
+GZIP_LEVEL: int = 5
+BROTLI_QUALITY: int = 4
+
+# Diagnostics settings
+DIAGNOSTICS_ENABLED: bool = os.getenv("DIAGNOSTICS_ENABLED", "true").lower() == "true"
+# Эндпоинты /debug/* доступны только при заданном токене, по заголовку X-Diagnostics-Token
+DIAGNOSTICS_TOKEN: Optional[str] = os.getenv("DIAGNOSTICS_TOKEN")
+LOOP_LAG_INTERVAL: float = 0.5
+LOOP_LAG_WARN: float = 0.1
+SLOW_CALLBACK_THRESHOLD: float = 0.5
+SLOW_CALLBACK_HISTORY: int = 20
+PROFILE_INTERVAL: float = 0.01
+PROFILE_MAX_SECONDS: int = 60
+
 # Concurrency settings
-MAX_CONCURRENT_REQUESTS: int = 5  
+MAX_CONCURRENT_REQUESTS: int = int(os.getenv("MAX_CONCURRENT_REQUESTS", 5))  # слоты справедливой очереди на воркер
 THREAD_POOL_SIZE: int = 3  
+CPU_POOL_SIZE: int = int(os.getenv("CPU_POOL_SIZE", 2))  # процессы для разбора RSS, JSON и HTML
+OFFLOAD_ENABLED: bool = os.getenv("OFFLOAD_ENABLED", "true").lower() == "true"
+OFFLOAD_MIN_BYTES: int = 32 * 1024  # payload меньше этого размера разбираем прямо в event loop
@@ -1,15 +1,39 @@
 import asyncio
+import hmac
 import logging
+import math
+import re
 from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request as HTTPRequest
+from fastapi.responses import ORJSONResponse, PlainTextResponse, Response as RawResponse
 from pydantic import BaseModel
 
-from config.settings import YC_GPT_MODEL
-from services.cache import get_cached_response, cache_response
-from services.gpt import process_with_gpt
-from services.news import get_itmo_news
+from config.settings import (
+    YC_GPT_MODEL,
+    FASTAPI_TIMEOUT,
+    REQUEST_MAX_TIMEOUT,
+    GPT_MIN_BUDGET,
+    GPT_BUDGET_FRACTION,
+    DEADLINE_MARGIN,
+    DIAGNOSTICS_ENABLED,
+    DIAGNOSTICS_TOKEN,
+    PROFILE_MAX_SECONDS,
+    RETRY_AFTER_BUSY
+)
+from services.answer_check import guess_from_context
+from services.cache import get_cached_response
+from services.enrich import close_enricher, prefetch_popular
+from services.news import aggregator, get_itmo_news
+from services.pipeline import answer_from_context, collect_context, store_answer, with_id
+from services.ratelimit import QueueFull, check_rate_limit, fair_queue, resolve_tenant, tenant_limits
 from services.search import search_google
+from services.semantic import find_similar_answer
+from services.warmup import warmup_job
+from utils.deadline import DeadlineExceeded, reset_deadline, scaled_reserve, set_deadline, time_left
+from utils.diagnostics import loop_monitor, profiler_busy, sample_stacks
+from utils.compression import CompressionMiddleware
+from utils.offload import start_pool, stop_pool
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -18,7 +42,29 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+app.add_middleware(CompressionMiddleware)
+
+_background_tasks: List[asyncio.Task] = []
+
+@app.on_event("startup")
+async def start_background_tasks():
+    await asyncio.to_thread(start_pool)
+    _background_tasks.append(asyncio.create_task(prefetch_popular()))
+    aggregator.start()
+    warmup_job.start()
+    if DIAGNOSTICS_ENABLED:
+        loop_monitor.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in _background_tasks:
+        task.cancel()
+    aggregator.stop()
+    warmup_job.stop()
+    loop_monitor.stop()
+    stop_pool()
+    await close_enricher()
 
 class Request(BaseModel):
     id: int
@@ -31,13 +77,66 @@ class Response(BaseModel):
     sources: List[str]
     model: str
 
+def _request_budget(header_timeout: Optional[float]) -> float:
+    if header_timeout is None or header_timeout <= 0:
+        return FASTAPI_TIMEOUT - DEADLINE_MARGIN
+    return min(header_timeout, REQUEST_MAX_TIMEOUT) - DEADLINE_MARGIN
+
+def _partial_response(request: Request, context: str) -> Response:
+    # Модель не успела ответить: выбираем вариант, который однозначно подтверждается контекстом
+    guess = guess_from_context(request.query, context)
+    return Response(
+        id=request.id,
+        answer=guess["answer"],
+        reasoning="Не удалось получить ответ модели за отведённое время, ответ выбран по найденным источникам."
+            if guess["answer"] is not None else "Не удалось получить ответ за отведённое время.",
+        sources=re.findall(r'Источник: (\S+)', context)[:3],
+        model=YC_GPT_MODEL
+    )
+
+def _send(request: Request, body: bytes) -> RawResponse:
+    return RawResponse(content=with_id(body, request.id), media_type="application/json")
+
+async def _answer_with_context(request: Request, news_task: asyncio.Task, search_task: asyncio.Task) -> RawResponse:
+    context = await collect_context(request.query, news_task, search_task)
+    try:
+        answer = await answer_from_context(request.query, context)
+    except DeadlineExceeded as e:
+        logger.warning(f"Deadline exceeded for request {request.id}: {str(e)}")
+        return _partial_response(request, context)
+    
+    logger.info(f"Successfully processed request {request.id}")
+    return _send(request, await store_answer(request.query, answer))
+
 @app.post("/api/request")
-async def process_request(request: Request) -> Response:
+async def process_request(
+    request: Request,
+    http_request: HTTPRequest,
+    x_request_timeout: Optional[float] = Header(None),
+    x_api_key: Optional[str] = Header(None),
+    x_client_id: Optional[str] = Header(None)
+) -> Response:
+    tenant = resolve_tenant(
+        x_api_key,
+        x_client_id,
+        http_request.headers.get("x-forwarded-for"),
+        http_request.client.host if http_request.client else None
+    )
+    allowed, retry_after = await check_rate_limit(tenant)
+    if not allowed:
+        logger.info(f"Rate limit exceeded for request {request.id}")
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+    
+    deadline_token = set_deadline(_request_budget(x_request_timeout))
     try:
         logger.info(f"Processing request {request.id}: {request.query}")
         
         # Выполняем проверку кэша, получение новостей и поиск параллельно
-        cache_task = asyncio.create_task(get_cached_response(request.id))
+        cache_task = asyncio.create_task(get_cached_response(request.query))
         news_task = asyncio.create_task(get_itmo_news())
         search_task = asyncio.create_task(search_google(request.query))
         
@@ -45,36 +144,77 @@ async def process_request(request: Request) -> Response:
         cached = await cache_task
         if cached:
             logger.info(f"Found cached response for request {request.id}")
-            return Response(
-                id=request.id,
-                answer=cached["answer"],
-                reasoning=cached["reasoning"],
-                sources=cached["sources"],
-                model=cached.get("model", YC_GPT_MODEL)
-            )
-        
-        # Если кэша нет, ждем результаты новостей и поиска
-        news, search_results = await asyncio.gather(news_task, search_task)
-        context = "\n\n".join(news + search_results)
-        
-        gpt_response = await process_with_gpt(request.query, context)
-        
-        response = Response(
-            id=request.id,
-            answer=gpt_response["answer"],
-            reasoning=gpt_response["reasoning"],
-            sources=gpt_response.get("sources", [])[:3],
-            model=YC_GPT_MODEL
-        )
+            news_task.cancel()
+            search_task.cancel()
+            # В кэше лежит готовое тело ответа, отдаём его без повторной сборки модели
+            return _send(request, cached)
         
-        await cache_response(request.id, response.dict())
+        # Перефразированный повтор уже отвеченного вопроса
+        similar = await find_similar_answer(request.query)
+        if similar:
+            logger.info(f"Found near-duplicate answer for request {request.id}")
+            news_task.cancel()
+            search_task.cancel()
+            return _send(request, await store_answer(request.query, similar))
         
-        logger.info(f"Successfully processed request {request.id}")
-        return response
+        # Дорогая часть (контекст и модель) идет через справедливую очередь,
+        # чтобы пачки запросов одного клиента не вытесняли остальных
+        weight = tenant_limits(tenant)["weight"]
+        try:
+            # Свободный слот занимаем сразу: wait_for с нулевым таймаутом отменил бы acquire до запуска
+            if not fair_queue.try_acquire(tenant, weight):
+                await asyncio.wait_for(
+                    fair_queue.acquire(tenant, weight),
+                    timeout=time_left(FASTAPI_TIMEOUT, reserve=scaled_reserve(GPT_MIN_BUDGET, GPT_BUDGET_FRACTION))
+                )
+        except (QueueFull, asyncio.TimeoutError) as e:
+            news_task.cancel()
+            search_task.cancel()
+            raise HTTPException(
+                status_code=429 if isinstance(e, QueueFull) else 503,
+                detail="Too many queued requests" if isinstance(e, QueueFull) else "Server is busy",
+                headers={"Retry-After": str(RETRY_AFTER_BUSY)}
+            )
+        try:
+            return await _answer_with_context(request, news_task, search_task)
+        finally:
+            fair_queue.release()
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing request {request.id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        reset_deadline(deadline_token)
+
+def _check_diagnostics_access(token: Optional[str]) -> None:
+    # Без токена диагностика наружу не открывается: стеки и профилирование - внутренняя информация
+    if not DIAGNOSTICS_ENABLED or not DIAGNOSTICS_TOKEN or not hmac.compare_digest(token or "", DIAGNOSTICS_TOKEN):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@app.get("/debug/loop")
+async def debug_loop(x_diagnostics_token: Optional[str] = Header(None)) -> dict:
+    _check_diagnostics_access(x_diagnostics_token)
+    return loop_monitor.stats()
+
+@app.get("/debug/profile")
+async def debug_profile(seconds: float = 10, x_diagnostics_token: Optional[str] = Header(None)) -> PlainTextResponse:
+    _check_diagnostics_access(x_diagnostics_token)
+    if profiler_busy():
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    
+    # Сэмплирование идёт в отдельном потоке, чтобы не блокировать event loop
+    seconds = min(max(seconds, 0.1), PROFILE_MAX_SECONDS)
+    try:
+        stacks = await asyncio.to_thread(sample_stacks, seconds)
+    except RuntimeError:
+        # Другой запрос успел запустить профилировщик между проверкой и запуском
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    return PlainTextResponse(
+        stacks,
+        headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'}
+    )
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8080, reload=True)
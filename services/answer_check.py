@@ -0,0 +1,131 @@
+import re
+from typing import Any, Dict, List, Optional
+
+OPTION_PATTERN = re.compile(r'(?m)^[ \t]*(\d+)[.)]\s+(.+?)[ \t]*$')
+WORD_PATTERN = re.compile(r'\w+')
+
+# Минимальная доля слов варианта, которые должны встретиться в тексте
+MATCH_THRESHOLD = 0.99
+# Насколько лучший вариант должен опережать второй, чтобы считаться однозначным
+MATCH_MARGIN = 0.34
+# Длина префикса, по которому сравниваются слова (грубый стемминг для русского)
+STEM_LENGTH = 5
+
+
+def parse_options(query: str) -> Dict[int, str]:
+    options = {}
+    for number, text in OPTION_PATTERN.findall(query):
+        options.setdefault(int(number), text)
+    return options if len(options) >= 2 else {}
+
+
+def _stems(text: str) -> List[str]:
+    words = WORD_PATTERN.findall(text.lower().replace('ё', 'е'))
+    # Однобуквенные слова (предлоги, буквы в ссылках) дают ложные совпадения
+    return [word if word.isdigit() else word[:STEM_LENGTH] for word in words if word.isdigit() or len(word) > 1]
+
+
+def _option_scores(options: Dict[int, str], text: str) -> Dict[int, float]:
+    text_stems = set(_stems(text))
+    scores = {}
+    for number, option in options.items():
+        option_stems = _stems(option)
+        if not option_stems or not text_stems:
+            scores[number] = 0.0
+            continue
+        found = sum(1 for stem in option_stems if stem in text_stems)
+        scores[number] = found / len(option_stems)
+    return scores
+
+
+def _unique_best(scores: Dict[int, float]) -> Optional[int]:
+    if not scores:
+        return None
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    best, best_score = ranked[0]
+    second_score = ranked[1][1] if len(ranked) > 1 else 0.0
+    if best_score >= MATCH_THRESHOLD and best_score - second_score >= MATCH_MARGIN:
+        return best
+    return None
+
+
+def _coerce_answer(raw: Any, options: Dict[int, str]) -> Optional[int]:
+    if isinstance(raw, bool) or raw is None:
+        return None
+    if isinstance(raw, str):
+        raw = raw.strip().rstrip('.')
+        if not raw.isdigit():
+            return None
+    try:
+        number = int(raw)
+    except (TypeError, ValueError):
+        return None
+    if number in options:
+        return number
+    # Модель иногда возвращает сам вариант (например, год) вместо его номера
+    for option_number, text in options.items():
+        if text.strip().rstrip('.') == str(number):
+            return option_number
+    return None
+
+
+def validate_answer(query: str, response: Dict[str, Any], context: str = "") -> Dict[str, Any]:
+    """Сверяет номер ответа с вариантами из вопроса, объяснением модели и контекстом.
+
+    Возвращает исправленный номер (или None) и оценку уверенности от 0 до 1.
+    """
+    options = parse_options(query)
+    if not options:
+        return {"answer": None, "confidence": 1.0}
+
+    answer = _coerce_answer(response.get("answer"), options)
+    reasoning_best = _unique_best(_option_scores(options, response.get("reasoning") or ""))
+
+    if answer is not None:
+        if reasoning_best is None or reasoning_best == answer:
+            return {"answer": answer, "confidence": 0.9 if reasoning_best == answer else 0.7}
+        # Объяснение упоминает другой вариант. Совпадение по словам - слабый довод, чтобы
+        # подменять ответ модели, поэтому оставляем её номер, но с низкой уверенностью,
+        # чтобы сработал повторный запрос
+        return {"answer": answer, "confidence": 0.3}
+
+    if reasoning_best is not None:
+        return {"answer": reasoning_best, "confidence": 0.6}
+
+    return guess_from_context(query, context)
+
+
+def select_context(query: str, context: str, limit: int) -> str:
+    """Фрагменты контекста, больше всего говорящие о вариантах и вопросе, не длиннее limit.
+
+    Новости идут в контексте первыми и обычно не относятся к вопросу, поэтому простое
+    усечение контекста оставило бы для повторного запроса только их.
+    """
+    options = parse_options(query)
+    option_stems = {stem for option in options.values() for stem in _stems(option)}
+    query_stems = set(_stems(OPTION_PATTERN.sub("", query)))
+    passages = [passage.strip() for passage in context.split("\n\n") if passage.strip()]
+
+    def score(passage: str) -> int:
+        stems = set(_stems(passage))
+        # Упоминание варианта ценнее совпадения со словами вопроса
+        return 2 * len(option_stems & stems) + len(query_stems & stems)
+
+    selected, size = [], 0
+    for passage in sorted(passages, key=score, reverse=True):
+        if size + len(passage) > limit:
+            if not selected:
+                selected.append(passage[:limit])
+            continue
+        selected.append(passage)
+        size += len(passage) + 2
+    return "\n\n".join(selected)
+
+
+def guess_from_context(query: str, context: str) -> Dict[str, Any]:
+    """Выбирает вариант, который однозначно подтверждается контекстом, без обращения к модели."""
+    options = parse_options(query)
+    context_best = _unique_best(_option_scores(options, context)) if context else None
+    if context_best is not None:
+        return {"answer": context_best, "confidence": 0.4}
+    return {"answer": None, "confidence": 0.0}
@@ -1,9 +1,18 @@
-import json
+import hashlib
+import re
 import time
-from typing import Optional, Any
+from collections import Counter, OrderedDict
+from typing import Optional, Any, Dict, Iterator, List, Tuple
 
 import redis.asyncio as redis
-from config.settings import REDIS_HOST, REDIS_PORT, REDIS_DB, CACHE_TTL
+from config.settings import (
+    REDIS_HOST,
+    REDIS_PORT,
+    REDIS_DB,
+    CACHE_TTL,
+    ANSWER_LOCAL_CACHE_SIZE,
+    ANSWER_POPULARITY_SIZE
+)
 
 redis_client = redis.Redis(
     host=REDIS_HOST,
@@ -12,27 +21,116 @@ redis_client = redis.Redis(
     decode_responses=True
 )
 
+# Ответы хранятся уже сериализованными, поэтому их читаем без декодирования
+redis_raw_client = redis.Redis(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    db=REDIS_DB,
+    decode_responses=False
+)
+
+
+class LocalTTLCache:
+    """Внутрипроцессный LRU-кэш с TTL, используется как первый уровень перед Redis."""
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (time.time() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def expires_in(self, key: str) -> Optional[float]:
+        item = self._data.get(key)
+        if item is None or item[0] < time.time():
+            return None
+        return item[0] - time.time()
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        now = time.time()
+        for key, (expires_at, value) in list(self._data.items()):
+            if expires_at >= now:
+                yield key, value
+
+
+_answer_cache = LocalTTLCache(ANSWER_LOCAL_CACHE_SIZE, CACHE_TTL)
+_popularity: Counter = Counter()  # ключ кэша -> число попаданий
+_popular_queries: Dict[str, str] = {}  # ключ кэша -> текст вопроса, чтобы его можно было пересчитать
+
 def get_cache_key(query: str) -> str:
-    timestamp = int(time.time() / 60)
-    return f"{query}:{timestamp}"
+    # Один и тот же вопрос от разных клиентов отличается только регистром и пробелами
+    normalized = " ".join(re.findall(r'\w+', query.lower().replace('ё', 'е')))
+    return f"answer:{hashlib.sha1(normalized.encode('utf-8')).hexdigest()}"
 
-async def get_cached_response(query: str) -> Optional[dict]:
+async def get_cached_response(query: str) -> Optional[bytes]:
+    cache_key = get_cache_key(query)
+    cached = _answer_cache.get(cache_key)
+    if cached is None:
+        try:
+            async with redis_raw_client.pipeline(transaction=False) as pipe:
+                cached, ttl_ms = await pipe.get(cache_key).pttl(cache_key).execute()
+        except Exception:
+            return None
+        if not cached:
+            return None
+        # Локальная копия живёт столько же, сколько осталось записи в Redis, а не полный CACHE_TTL
+        if ttl_ms == -1:
+            _answer_cache.set(cache_key, cached)
+        elif ttl_ms > 0:
+            _answer_cache.set(cache_key, cached, ttl_ms / 1000)
+    _count_hit(cache_key, query)
+    return cached
+
+def _count_hit(cache_key: str, query: str) -> None:
+    _popularity[cache_key] += 1
+    _popular_queries[cache_key] = query
+    if len(_popularity) > ANSWER_POPULARITY_SIZE:
+        # Между окнами прогрева счётчик не затухает, поэтому ограничиваем его размер
+        keep = dict(_popularity.most_common(ANSWER_POPULARITY_SIZE // 2))
+        _popularity.clear()
+        _popularity.update(keep)
+        for key in list(_popular_queries):
+            if key not in keep:
+                del _popular_queries[key]
+
+async def cache_response(query: str, body: bytes, ttl: int = CACHE_TTL) -> None:
+    cache_key = get_cache_key(query)
+    _answer_cache.set(cache_key, body, ttl)
     try:
-        cache_key = get_cache_key(query)
-        cached = await redis_client.get(cache_key)
-        if cached:
-            return json.loads(cached)
-        return None
+        await redis_raw_client.setex(cache_key, ttl, body)
     except Exception:
-        return None
+        pass
 
-async def cache_response(query: str, response: Any) -> None:
+async def cached_ttl(query: str) -> float:
+    """Сколько секунд ещё проживёт закэшированный ответ, 0 - если его нет."""
+    cache_key = get_cache_key(query)
     try:
-        cache_key = get_cache_key(query)
-        await redis_client.setex(
-            cache_key,
-            CACHE_TTL,
-            json.dumps(response)
-        )
+        ttl = await redis_raw_client.ttl(cache_key)
     except Exception:
-        pass
+        return _answer_cache.expires_in(cache_key) or 0.0
+    return float(max(ttl, 0))
+
+def popular_queries(limit: int) -> List[str]:
+    queries = [_popular_queries[key] for key, _ in _popularity.most_common(limit)]
+    # Постепенно забываем старую популярность
+    for key in list(_popularity):
+        _popularity[key] //= 2
+        if not _popularity[key]:
+            del _popularity[key]
+            del _popular_queries[key]
+    return queries
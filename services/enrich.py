@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import re
+import time
+from collections import Counter
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from config.settings import (
+    ENRICH_TOP_K,
+    ENRICH_MAX_CONCURRENCY,
+    ENRICH_PER_HOST,
+    ENRICH_MAX_BYTES,
+    ENRICH_FETCH_TIMEOUT,
+    ENRICH_CHUNK_CHARS,
+    ENRICH_PASSAGES_PER_PAGE,
+    ENRICH_CACHE_TTL,
+    ENRICH_CACHE_SIZE,
+    ENRICH_PREFETCH_INTERVAL,
+    ENRICH_PREFETCH_TOP
+)
+from services.cache import LocalTTLCache
+from utils.offload import run_cpu
+
+logger = logging.getLogger(__name__)
+
+SKIP_TAGS = {"script", "style", "noscript", "svg", "nav", "header", "footer", "aside", "form", "iframe", "template"}
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "li", "ul", "ol", "br", "tr", "table",
+              "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre"}
+
+# Записи держим дольше ENRICH_CACHE_TTL, чтобы перепроверять их по ETag, а не скачивать заново
+_page_cache = LocalTTLCache(ENRICH_CACHE_SIZE, ENRICH_CACHE_TTL * 4)
+_inflight: Dict[str, asyncio.Task] = {}
+_host_limits: Dict[str, asyncio.Semaphore] = {}
+_popularity: Counter = Counter()
+_pool_limit: Optional[asyncio.Semaphore] = None
+_session: Optional[aiohttp.ClientSession] = None
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._skip_depth = 0
+        self._parts: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._parts.append(data)
+
+    def text(self) -> str:
+        lines = (re.sub(r'\s+', ' ', line).strip() for line in "".join(self._parts).split("\n"))
+        # Короткие строки - это обычно меню, кнопки и подписи
+        return "\n".join(line for line in lines if len(line) > 40)
+
+
+def extract_text(html: str) -> str:
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.text()
+
+
+def chunk_text(text: str, size: int = ENRICH_CHUNK_CHARS) -> List[str]:
+    chunks, current = [], ""
+    for paragraph in text.split("\n"):
+        while len(paragraph) > size:
+            cut = paragraph.rfind(". ", 0, size)
+            cut = cut + 1 if cut > 0 else size
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:cut].strip())
+            paragraph = paragraph[cut:].strip()
+        if current and len(current) + len(paragraph) + 1 > size:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def extract_passages(html: str) -> List[str]:
+    return chunk_text(extract_text(html))
+
+
+def _words(text: str) -> set:
+    return {word[:5] for word in re.findall(r'\w+', text.lower().replace('ё', 'е')) if len(word) > 2}
+
+
+def select_passages(passages: List[str], query: str, limit: int = ENRICH_PASSAGES_PER_PAGE) -> List[str]:
+    query_words = _words(query)
+    ranked = sorted(passages, key=lambda passage: len(query_words & _words(passage)), reverse=True)
+    return ranked[:limit]
+
+
+def _get_session() -> aiohttp.ClientSession:
+    global _session, _pool_limit
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=ENRICH_FETCH_TIMEOUT),
+            headers={"User-Agent": "Mozilla/5.0 (compatible; itmo-ai-bot)"}
+        )
+        _pool_limit = asyncio.Semaphore(ENRICH_MAX_CONCURRENCY)
+    return _session
+
+
+async def close_enricher() -> None:
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def _download(url: str, entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    session = _get_session()
+    host = urlsplit(url).netloc
+    host_limit = _host_limits.setdefault(host, asyncio.Semaphore(ENRICH_PER_HOST))
+    headers = {}
+    if entry is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    async with _pool_limit, host_limit:
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304 and entry is not None:
+                return {**entry, "fetched_at": time.time()}
+            if response.status != 200:
+                logger.warning(f"Failed to fetch page {url}, status code: {response.status}")
+                return None
+            if "html" not in response.headers.get("Content-Type", "html"):
+                return None
+            if response.content_length and response.content_length > ENRICH_MAX_BYTES:
+                logger.info(f"Page {url} is too large ({response.content_length} bytes), skipping")
+                return None
+
+            body = bytearray()
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                body.extend(chunk)
+                if len(body) >= ENRICH_MAX_BYTES:
+                    del body[ENRICH_MAX_BYTES:]
+                    break
+            try:
+                encoding = response.get_encoding()
+            except RuntimeError:
+                encoding = "utf-8"
+            html = bytes(body).decode(encoding, errors="replace")
+
+            return {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "passages": await run_cpu(extract_passages, html),
+                "fetched_at": time.time()
+            }
+
+
+async def _refresh(url: str) -> List[str]:
+    entry = _page_cache.get(url)
+    try:
+        fetched = await _download(url, entry)
+    except Exception as e:
+        logger.warning(f"Error fetching page {url}: {str(e)}")
+        fetched = None
+    if fetched is None:
+        return entry["passages"] if entry is not None else []
+    _page_cache.set(url, fetched)
+    return fetched["passages"]
+
+
+def get_passages(url: str, max_age: float = ENRICH_CACHE_TTL) -> asyncio.Future:
+    entry = _page_cache.get(url)
+    if entry is not None and time.time() - entry["fetched_at"] < max_age:
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(entry["passages"])
+        return future
+
+    # Одновременные запросы одной страницы используют одну загрузку
+    task = _inflight.get(url)
+    if task is None:
+        task = asyncio.create_task(_refresh(url))
+        _inflight[url] = task
+        task.add_done_callback(lambda _: _inflight.pop(url, None))
+    return task
+
+
+async def enrich_results(results: List[Dict[str, Any]], query: str, timeout: float) -> Dict[str, List[str]]:
+    """Возвращает подходящие к вопросу фрагменты страниц, успевших загрузиться за timeout.
+
+    Незавершённые загрузки не отменяются и дозаполняют кэш в фоне.
+    """
+    links = [item["link"] for item in results[:ENRICH_TOP_K] if item.get("link")]
+    if not links or timeout <= 0:
+        return {}
+    _popularity.update(links)
+
+    tasks = {link: get_passages(link) for link in links}
+    await asyncio.wait(tasks.values(), timeout=timeout)
+
+    enriched = {}
+    for link, task in tasks.items():
+        if task.done() and not task.cancelled() and task.exception() is None and task.result():
+            enriched[link] = select_passages(task.result(), query)
+    return enriched
+
+
+async def prefetch_popular() -> None:
+    # Фоновое обновление популярных страниц, чтобы запросы попадали в кэш
+    while True:
+        await asyncio.sleep(ENRICH_PREFETCH_INTERVAL)
+        urls = [url for url, _ in _popularity.most_common(ENRICH_PREFETCH_TOP)]
+        if urls:
+            # Перепроверяем и те страницы, что устареют до следующего прохода, иначе
+            # запросы между проходами будут ждать их загрузки
+            max_age = max(ENRICH_CACHE_TTL - ENRICH_PREFETCH_INTERVAL, 0)
+            await asyncio.gather(*[get_passages(url, max_age) for url in urls], return_exceptions=True)
+            logger.info(f"Prefetched {len(urls)} popular pages")
+        # Постепенно забываем старую популярность
+        for url in list(_popularity):
+            _popularity[url] //= 2
+            if not _popularity[url]:
+                del _popularity[url]
@@ -1,11 +1,16 @@
 import os
 import json
+import asyncio
 import aiohttp
-import re
 from typing import Dict
 from fastapi import HTTPException
 import logging
 
+from config.settings import ANSWER_MIN_CONFIDENCE, REASK_CONTEXT_CHARS, REASK_MAX_TOKENS, GPT_TIMEOUT, REASK_MIN_BUDGET
+from services.answer_check import parse_options, select_context, validate_answer
+from utils.deadline import DeadlineExceeded, time_left
+from utils.offload import run_cpu
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -41,9 +46,14 @@ def create_system_message() -> str:
 6. Все поля в ответе обязательны
 """
 
-async def _make_request(query: str, context: str = "") -> Dict:
+def create_reask_message() -> str:
+    return """Ты - ассистент для ответов на вопросы об Университете ИТМО. Выбери один из пронумерованных вариантов.
+Ответь только JSON: {"answer": номер варианта, "reasoning": "одно предложение"}
+"""
+
+async def _make_request(query: str, context: str = "", system_message: str = None, max_tokens: int = 2000) -> Dict:
     messages = [
-        {"role": "system", "text": create_system_message()},
+        {"role": "system", "text": system_message or create_system_message()},
         {"role": "user", "text": f"Контекст:\n{context}\n\nВопрос:\n{query}" if context else query}
     ]
     
@@ -52,44 +62,71 @@ async def _make_request(query: str, context: str = "") -> Dict:
         "completionOptions": {
             "stream": False,
             "temperature": 0.6,
-            "maxTokens": "2000"
+            "maxTokens": str(max_tokens)
         },
         "messages": messages
     }
     
+    timeout = time_left(GPT_TIMEOUT)
+    if timeout <= 0:
+        raise DeadlineExceeded("No time left for YandexGPT request")
+    
     logger.info(f"Sending request to YandexGPT API: {json.dumps(data, ensure_ascii=False)}")
     
-    async with aiohttp.ClientSession() as session:
+    try:
+        return await _post_completion(data, timeout)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"YandexGPT request timed out after {timeout:.1f}s")
+
+async def _post_completion(data: Dict, timeout: float) -> Dict:
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
         async with session.post(API_URL, headers=HEADERS, json=data) as response:
             if response.status != 200:
                 error_text = await response.text()
                 logger.error(f"{response.status} - {error_text}")
                 raise HTTPException(status_code=response.status, detail=error_text)
             
-            result = await response.json()
-            logger.info(f"Raw API response: {json.dumps(result, ensure_ascii=False)}")
+            # Логируем тело как есть, без повторной сериализации
+            raw = await response.text()
+            logger.info(f"Raw API response: {raw}")
             
             try:
-                response_text = result["result"]["alternatives"][0]["message"]["text"]
-                response_text = response_text.strip('`').strip()
-                if response_text.startswith('json\n'):
-                    response_text = response_text[5:]
-                logger.info(f"Cleaned text: {response_text}")
-                return json.loads(response_text)
+                return await run_cpu(_extract_completion, raw)
             except Exception as e:
                 logger.error(f"Error parsing response: {e}")
-                logger.error(f"Response structure: {result}")
                 raise HTTPException(status_code=500, detail="Failed to parse GPT response")
 
+def _extract_completion(raw: str) -> Dict:
+    result = json.loads(raw)
+    response_text = result["result"]["alternatives"][0]["message"]["text"]
+    response_text = response_text.strip('`').strip()
+    if response_text.startswith('json\n'):
+        response_text = response_text[5:]
+    return json.loads(response_text)
+
 def _has_numbered_options(query: str) -> bool:
-    pattern = r'(?m)^[ \t]*(\d+)\.\s'
-    matches = re.findall(pattern, query)
-    return len(set(matches)) >= 2
+    return bool(parse_options(query))
+
+async def _reask(query: str, context: str) -> Dict:
+    # Короткий повторный запрос: самые относящиеся к вопросу фрагменты и только номер варианта
+    if time_left(GPT_TIMEOUT) < REASK_MIN_BUDGET:
+        logger.info("Not enough time left for re-ask")
+        return {"answer": None, "confidence": 0.0}
+    try:
+        response = await _make_request(
+            query,
+            select_context(query, context, REASK_CONTEXT_CHARS),
+            system_message=create_reask_message(),
+            max_tokens=REASK_MAX_TOKENS
+        )
+    except Exception as e:
+        logger.warning(f"Re-ask failed: {str(e)}")
+        return {"answer": None, "confidence": 0.0}
+    return validate_answer(query, response, context)
 
 async def process_with_gpt(query: str, context: str = "") -> Dict:
     try:
         response = await _make_request(query, context)
-        has_numbered_options = _has_numbered_options(query)
         
         result = {
             "answer": None,
@@ -98,11 +135,21 @@ async def process_with_gpt(query: str, context: str = "") -> Dict:
             "model": response.get("model", "yandexgpt-lite")
         }
         
-        if has_numbered_options and "answer" in response and isinstance(response["answer"], (int, float)):
-            result["answer"] = int(response["answer"])
+        if _has_numbered_options(query):
+            checked = validate_answer(query, response, context)
+            if checked["confidence"] < ANSWER_MIN_CONFIDENCE:
+                logger.info(f"Low answer confidence ({checked['confidence']}), re-asking")
+                reasked = await _reask(query, context)
+                if reasked["answer"] is not None and reasked["confidence"] >= checked["confidence"]:
+                    checked = reasked
+            if checked["answer"] != response.get("answer"):
+                logger.info(f"Answer corrected from {response.get('answer')} to {checked['answer']}")
+            result["answer"] = checked["answer"]
             
         return result
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"YandexGPT API error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
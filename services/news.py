@@ -1,39 +1,172 @@
 import feedparser
 import aiohttp
 import asyncio
+import bisect
+import calendar
+import hashlib
+import itertools
 import logging
-from typing import List, Dict, Any
-from config.settings import ITMO_NEWS_RSS, HTTP_TIMEOUT
+import re
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+from config.settings import (
+    NEWS_SOURCES,
+    NEWS_DEFAULT_INTERVAL,
+    NEWS_MAX_BACKOFF,
+    NEWS_STORE_SIZE,
+    NEWS_DEDUP_SIZE,
+    NEWS_CONTEXT_ITEMS,
+    HTTP_TIMEOUT
+)
+from utils.offload import run_cpu
 
 logger = logging.getLogger(__name__)
 
-async def get_itmo_news() -> List[Dict[str, Any]]:
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(ITMO_NEWS_RSS, timeout=HTTP_TIMEOUT) as response:
+def _content_hash(title: str, summary: str) -> str:
+    # Одна и та же новость в разных лентах может отличаться разметкой и пробелами
+    text = re.sub(r'\W+', ' ', re.sub(r'<[^>]+>', ' ', f"{title} {summary}".lower()))
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+def _parse_feed(content: str) -> List[Dict[str, Any]]:
+    feed = feedparser.parse(content)
+    items = []
+    for entry in feed.entries:
+        title = entry.get('title', '')
+        summary = entry.get('summary', '')
+        published = entry.get('published_parsed') or entry.get('updated_parsed')
+        items.append({
+            'title': title,
+            'link': entry.get('link', ''),
+            'summary': summary,
+            'published': entry.get('published', ''),
+            'guid': entry.get('id') or entry.get('link', ''),
+            'hash': _content_hash(title, summary),
+            'timestamp': calendar.timegm(published) if published else time.time()
+        })
+    return items
+
+
+class NewsStore:
+    """Ограниченное хранилище новостей, упорядоченное по дате публикации, с дедупликацией."""
+
+    def __init__(self, size: int = NEWS_STORE_SIZE, dedup_size: int = NEWS_DEDUP_SIZE):
+        self.size = size
+        self.dedup_size = dedup_size
+        self._items: List[tuple] = []  # (-timestamp, порядковый номер, новость)
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._counter = itertools.count()
+
+    def _remember(self, key: str) -> None:
+        self._seen[key] = None
+        if len(self._seen) > self.dedup_size:
+            self._seen.popitem(last=False)
+
+    def add(self, items: List[Dict[str, Any]]) -> int:
+        added = 0
+        for item in items:
+            # Без id и ссылки у записи нет GUID, тогда дубликаты ищем только по содержимому
+            keys = [f"hash:{item['hash']}"] + ([f"guid:{item['guid']}"] if item['guid'] else [])
+            if any(key in self._seen for key in keys):
+                continue
+            for key in keys:
+                self._remember(key)
+            bisect.insort(self._items, (-item['timestamp'], next(self._counter), item))
+            added += 1
+        del self._items[self.size:]
+        return added
+
+    def latest(self, limit: int) -> List[Dict[str, Any]]:
+        return [item for _, _, item in self._items[:limit]]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class FeedSource:
+    def __init__(self, name: str, url: str, interval: int = NEWS_DEFAULT_INTERVAL):
+        self.name = name
+        self.url = url
+        self.interval = interval
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.failures = 0
+        self.next_poll = 0.0
+
+    def schedule(self, success: bool) -> None:
+        self.failures = 0 if success else self.failures + 1
+        delay = min(self.interval * 2 ** self.failures, max(NEWS_MAX_BACKOFF, self.interval))
+        self.next_poll = time.monotonic() + delay
+
+
+class NewsAggregator:
+    """Опрашивает все источники в фоне; запросы к API читают только готовое хранилище."""
+
+    def __init__(self, sources: List[Dict[str, Any]]):
+        self.sources = [FeedSource(**source) for source in sources]
+        self.store = NewsStore()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def refresh(self) -> None:
+        # Однократный опрос всех источников, для процессов без фонового опроса
+        timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            await asyncio.gather(*[self._poll(session, source) for source in self.sources])
+
+    async def _run(self) -> None:
+        timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            # У каждого источника свой цикл, чтобы медленная лента не задерживала остальные
+            await asyncio.gather(*[self._source_loop(session, source) for source in self.sources])
+
+    async def _source_loop(self, session: aiohttp.ClientSession, source: FeedSource) -> None:
+        while True:
+            await asyncio.sleep(max(0.0, source.next_poll - time.monotonic()))
+            await self._poll(session, source)
+
+    async def _poll(self, session: aiohttp.ClientSession, source: FeedSource) -> None:
+        headers = {}
+        if source.etag:
+            headers["If-None-Match"] = source.etag
+        if source.last_modified:
+            headers["If-Modified-Since"] = source.last_modified
+        try:
+            async with session.get(source.url, headers=headers) as response:
+                if response.status == 304:
+                    source.schedule(success=True)
+                    return
                 if response.status != 200:
-                    logger.warning(f"Failed to fetch news, status code: {response.status}")
-                    return []
-                
+                    logger.warning(f"Failed to fetch news from {source.name}, status code: {response.status}")
+                    source.schedule(success=False)
+                    return
                 content = await response.text()
-                feed = feedparser.parse(content)
-                
-                if not feed.entries:
-                    logger.warning("No news entries found in the feed")
-                    return []
-                
-                return [
-                    {
-                        'title': entry.get('title', ''),
-                        'link': entry.get('link', ''),
-                        'summary': entry.get('summary', ''),
-                        'published': entry.get('published', '')
-                    }
-                    for entry in feed.entries[:5]
-                ]
-    except asyncio.TimeoutError:
-        logger.error(f"Timeout while fetching news (after {HTTP_TIMEOUT}s)")
-        return []
-    except Exception as e:
-        logger.error(f"Error fetching news: {str(e)}")
-        return []
+                source.etag = response.headers.get("ETag")
+                source.last_modified = response.headers.get("Last-Modified")
+            items = await run_cpu(_parse_feed, content)
+            added = self.store.add(items)
+            if not items:
+                logger.warning(f"No news entries found in the feed {source.name}")
+            elif added:
+                logger.info(f"Added {added} news items from {source.name}")
+            source.schedule(success=True)
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout while fetching news from {source.name} (after {HTTP_TIMEOUT}s)")
+            source.schedule(success=False)
+        except Exception as e:
+            logger.error(f"Error fetching news from {source.name}: {str(e)}")
+            source.schedule(success=False)
+
+
+aggregator = NewsAggregator(NEWS_SOURCES)
+
+async def get_itmo_news() -> List[Dict[str, Any]]:
+    return aggregator.store.latest(NEWS_CONTEXT_ITEMS)
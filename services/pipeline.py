@@ -0,0 +1,59 @@
+import asyncio
+import logging
+from typing import Any, Dict
+
+import orjson
+
+from config.settings import YC_GPT_MODEL, FASTAPI_TIMEOUT, GPT_MIN_BUDGET, GPT_BUDGET_FRACTION, CACHE_TTL
+from services.cache import cache_response
+from services.gpt import process_with_gpt
+from services.semantic import index_passages, related_passages, remember_answer
+from utils.deadline import scaled_reserve, time_left
+
+logger = logging.getLogger(__name__)
+
+
+def format_news(item: dict) -> str:
+    return f"{item['title']}\n{item['summary']}\nИсточник: {item['link']}"
+
+
+def with_id(body: bytes, request_id: int) -> bytes:
+    # В кэше ответ хранится без id, чтобы его можно было отдать на тот же вопрос с любым id
+    return b'{"id":%d,' % request_id + body[1:]
+
+
+async def collect_context(query: str, news_task: asyncio.Task, search_task: asyncio.Task) -> str:
+    # Ждем результаты новостей и поиска, оставляя время на вызов модели
+    context_budget = time_left(FASTAPI_TIMEOUT, reserve=scaled_reserve(GPT_MIN_BUDGET, GPT_BUDGET_FRACTION))
+    done, pending = await asyncio.wait({news_task, search_task}, timeout=context_budget)
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning(f"Context collection cut off after {context_budget:.1f}s")
+
+    news = news_task.result() if news_task in done else []
+    search_results = search_task.result() if search_task in done else []
+    passages = [format_news(item) for item in news] + search_results
+    related = await related_passages(query, exclude=passages)
+    await index_passages(passages)
+    return "\n\n".join(passages + related)
+
+
+async def answer_from_context(query: str, context: str) -> Dict[str, Any]:
+    """Ответ модели без id; DeadlineExceeded пробрасывается вызывающему."""
+    gpt_response = await process_with_gpt(query, context)
+    answer = {
+        "answer": gpt_response["answer"],
+        "reasoning": gpt_response["reasoning"],
+        "sources": gpt_response.get("sources", [])[:3],
+        "model": YC_GPT_MODEL
+    }
+    await remember_answer(query, answer)
+    return answer
+
+
+async def store_answer(query: str, answer: Dict[str, Any], ttl: int = CACHE_TTL) -> bytes:
+    # Сериализуем один раз: те же байты уходят и в кэш, и клиенту
+    body = orjson.dumps(answer)
+    await cache_response(query, body, ttl)
+    return body
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import logging
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import (
+    RATE_LIMIT_RATE,
+    RATE_LIMIT_BURST,
+    TENANT_LIMITS,
+    MAX_CONCURRENT_REQUESTS,
+    MAX_QUEUED_PER_TENANT
+)
+from services.cache import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Токен-бакет целиком на стороне Redis, чтобы лимит был общим для всех воркеров gunicorn
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+_local_buckets: Dict[str, Tuple[float, float]] = {}
+
+
+def tenant_limits(tenant: str) -> Dict[str, float]:
+    limits = {"rate": RATE_LIMIT_RATE, "burst": RATE_LIMIT_BURST, "weight": 1.0}
+    limits.update(TENANT_LIMITS.get(tenant, {}))
+    return limits
+
+
+def resolve_tenant(api_key: Optional[str], client_id: Optional[str],
+                   forwarded_for: Optional[str], client_host: Optional[str]) -> str:
+    # Заголовкам верим только для настроенных клиентов: иначе новый id на каждый
+    # запрос давал бы новый полный бакет
+    for header_id in (api_key, client_id):
+        if header_id and header_id in TENANT_LIMITS:
+            return header_id
+    # За API Gateway адрес соединения общий, настоящий адрес клиента - в X-Forwarded-For
+    if forwarded_for:
+        return forwarded_for.split(",")[0].strip()
+    return client_host or "anonymous"
+
+
+def _bucket_key(tenant: str) -> str:
+    # Не храним API-ключи в Redis в открытом виде
+    return f"ratelimit:{hashlib.sha1(tenant.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _take_local(key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, float]:
+    now = time.monotonic()
+    tokens, ts = _local_buckets.get(key, (burst, now))
+    tokens = min(burst, tokens + (now - ts) * rate)
+    if tokens >= cost:
+        _local_buckets[key] = (tokens - cost, now)
+        return True, 0.0
+    _local_buckets[key] = (tokens, now)
+    return False, (cost - tokens) / rate
+
+
+async def check_rate_limit(tenant: str) -> Tuple[bool, float]:
+    """Списывает токен из бакета клиента. Возвращает (разрешено, через сколько секунд повторить)."""
+    limits = tenant_limits(tenant)
+    key = _bucket_key(tenant)
+    try:
+        allowed, retry_after = await redis_client.eval(
+            TOKEN_BUCKET_SCRIPT, 1, key, limits["rate"], limits["burst"], 1
+        )
+        return bool(int(allowed)), float(retry_after)
+    except Exception as e:
+        # Без Redis лимит действует в пределах процесса
+        logger.debug(f"Redis rate limiter unavailable, using local bucket: {str(e)}")
+        return _take_local(key, limits["rate"], limits["burst"])
+
+
+class QueueFull(Exception):
+    pass
+
+
+class FairQueue:
+    """Взвешенная справедливая очередь (WFQ) на дорогую часть обработки запроса.
+
+    Одновременно выполняется не больше concurrency запросов. Ожидающие получают слот
+    в порядке виртуального времени завершения: у каждого клиента оно растёт на 1/weight
+    за запрос, поэтому пачка запросов одного клиента не обгоняет одиночные запросы других.
+    """
+
+    def __init__(self, concurrency: int = MAX_CONCURRENT_REQUESTS, max_queued: int = MAX_QUEUED_PER_TENANT):
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.active = 0
+        self._virtual_time = 0.0
+        self._finish_tags: Dict[str, float] = {}
+        self._heap: List[Tuple[float, int, str, asyncio.Future]] = []
+        self._queued: Counter = Counter()
+        self._counter = itertools.count()
+
+    def queued(self, tenant: Optional[str] = None) -> int:
+        return self._queued[tenant] if tenant is not None else sum(self._queued.values())
+
+    def _tag(self, tenant: str, weight: float) -> float:
+        tag = max(self._virtual_time, self._finish_tags.get(tenant, 0.0)) + 1.0 / weight
+        self._finish_tags[tenant] = tag
+        return tag
+
+    def try_acquire(self, tenant: str, weight: float = 1.0) -> bool:
+        """Занимает слот без ожидания, если он свободен и очереди нет."""
+        if self.active < self.concurrency and not self._heap:
+            self.active += 1
+            self._virtual_time = self._tag(tenant, weight)
+            return True
+        return False
+
+    async def acquire(self, tenant: str, weight: float = 1.0) -> None:
+        if self.try_acquire(tenant, weight):
+            return
+        if self._queued[tenant] >= self.max_queued:
+            raise QueueFull(tenant)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (self._tag(tenant, weight), next(self._counter), tenant, future))
+        self._queued[tenant] += 1
+        try:
+            await future
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # Слот уже выдан, но запрос ушёл - отдаём слот следующему
+                self.release()
+            else:
+                future.cancel()
+                self._dequeued(tenant)
+            raise
+
+    def _dequeued(self, tenant: str) -> None:
+        self._queued[tenant] -= 1
+        if self._queued[tenant] <= 0:
+            del self._queued[tenant]
+
+    def release(self) -> None:
+        while self._heap:
+            tag, _, tenant, future = heapq.heappop(self._heap)
+            if future.cancelled():
+                continue
+            self._dequeued(tenant)
+            self._virtual_time = tag
+            future.set_result(None)
+            return
+        self.active -= 1
+        if not self.active:
+            # Все простаивают - старые метки больше не нужны
+            self._finish_tags.clear()
+            self._virtual_time = 0.0
+
+
+fair_queue = FairQueue()
@@ -1,7 +1,11 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import json
 import logging
+import re
+import time
 
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
@@ -10,19 +14,150 @@ from config.settings import (
     GOOGLE_API_KEY,
     GOOGLE_CSE_ID,
     MAX_SEARCH_RESULTS,
-    SEARCH_TIMEOUT
+    SEARCH_TIMEOUT,
+    SEARCH_CACHE_TTL,
+    SEARCH_STALE_TTL,
+    SEARCH_LOCAL_CACHE_SIZE,
+    SEARCH_DAILY_QUOTA,
+    SEARCH_QUOTA_RESERVE,
+    SEARCH_QUOTA_UTC_OFFSET,
+    ENRICH_CUTOFF
 )
+from services.cache import LocalTTLCache, redis_client
+from services.enrich import enrich_results
+from utils.deadline import time_left
 
 _executor = ThreadPoolExecutor(max_workers=3)
 logger = logging.getLogger(__name__)
 
+_local_cache = LocalTTLCache(SEARCH_LOCAL_CACHE_SIZE, SEARCH_CACHE_TTL + SEARCH_STALE_TTL)
+_local_quota: Dict[str, int] = {}
+
+def canonicalize_query(query: str) -> str:
+    # Регистр, пунктуация, пробелы и повторы слов не влияют на выдачу CSE
+    words = re.findall(r'\w+', query.lower().replace('ё', 'е'))
+    return " ".join(dict.fromkeys(words))
+
+def _search_cache_key(search_query: str) -> str:
+    return f"search:{search_query}"
+
+def _pack_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "t": time.time(),
+        "r": [[item["title"], item["link"], item["snippet"]] for item in results]
+    }
+
+def _unpack_results(entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"title": title, "link": link, "snippet": snippet} for title, link, snippet in entry["r"]]
+
+def _is_fresh(entry: Dict[str, Any]) -> bool:
+    return time.time() - entry["t"] < SEARCH_CACHE_TTL
+
+async def _get_cached_search(key: str) -> Optional[Dict[str, Any]]:
+    entry = _local_cache.get(key)
+    if entry is not None:
+        return entry
+    try:
+        cached = await redis_client.get(key)
+    except Exception:
+        return None
+    if not cached:
+        return None
+    entry = json.loads(cached)
+    _local_cache.set(key, entry)
+    return entry
+
+async def _store_search(key: str, results: List[Dict[str, Any]]) -> None:
+    entry = _pack_results(results)
+    _local_cache.set(key, entry)
+    try:
+        await redis_client.setex(
+            key,
+            SEARCH_CACHE_TTL + SEARCH_STALE_TTL,
+            json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        )
+    except Exception:
+        pass
+
+def _quota_key() -> str:
+    day = (datetime.utcnow() + timedelta(hours=SEARCH_QUOTA_UTC_OFFSET)).strftime("%Y-%m-%d")
+    return f"search_quota:{day}"
+
+async def _quota_used() -> int:
+    key = _quota_key()
+    try:
+        used = await redis_client.get(key)
+        return int(used or 0)
+    except Exception:
+        return _local_quota.get(key, 0)
+
+async def _spend_quota() -> bool:
+    key = _quota_key()
+    try:
+        used = await redis_client.incr(key)
+        if used == 1:
+            await redis_client.expire(key, 2 * 24 * 3600)
+    except Exception:
+        # Без Redis считаем квоту в пределах процесса
+        if key not in _local_quota:
+            _local_quota.clear()
+        _local_quota[key] = _local_quota.get(key, 0) + 1
+        used = _local_quota[key]
+    return used <= SEARCH_DAILY_QUOTA
+
+async def quota_remaining() -> int:
+    # Сколько запросов к CSE можно потратить, не залезая в резерв для живых запросов
+    return SEARCH_DAILY_QUOTA - SEARCH_QUOTA_RESERVE - await _quota_used()
+
+def _local_index_lookup(search_query: str) -> List[Dict[str, Any]]:
+    # Ищем подходящие результаты среди уже закэшированных запросов
+    query_words = set(search_query.split())
+    scored = {}
+    for _, entry in _local_cache.items():
+        for item in _unpack_results(entry):
+            text_words = set(canonicalize_query(f"{item['title']} {item['snippet']}").split())
+            score = len(query_words & text_words)
+            if score and score > scored.get(item["link"], (0, None))[0]:
+                scored[item["link"]] = (score, item)
+    ranked = sorted(scored.values(), key=lambda pair: pair[0], reverse=True)
+    return [item for _, item in ranked[:MAX_SEARCH_RESULTS]]
+
 async def search_itmo_info(query: str) -> List[Dict[str, Any]]:
+    # Добавляем "ИТМО" к запросу для более релевантных результатов.
+    # Каноническая форма нужна только для ключа кэша: в CSE уходит исходный текст
+    # с пунктуацией ("C++", "51-100", "ИТМО.Старт")
+    raw_query = f"ИТМО {query}"
+    search_query = canonicalize_query(raw_query)
+    cache_key = _search_cache_key(search_query)
+    entry = await _get_cached_search(cache_key)
+    
+    if entry is not None and _is_fresh(entry):
+        return _unpack_results(entry)
+    
+    used = await _quota_used()
+    if entry is not None and used >= SEARCH_DAILY_QUOTA - SEARCH_QUOTA_RESERVE:
+        logger.info(f"Search quota is low ({used}/{SEARCH_DAILY_QUOTA}), serving stale results")
+        return _unpack_results(entry)
+    
+    if time_left(SEARCH_TIMEOUT) <= 0:
+        return _unpack_results(entry) if entry is not None else []
+    
+    if used >= SEARCH_DAILY_QUOTA or not await _spend_quota():
+        logger.warning(f"Search quota exhausted ({SEARCH_DAILY_QUOTA}), using local index")
+        return _local_index_lookup(search_query)
+    
+    results = await _search_cse(raw_query)
+    if results is None:
+        return _unpack_results(entry) if entry is not None else []
+    
+    await _store_search(cache_key, results)
+    return results
+
+async def _search_cse(search_query: str) -> Optional[List[Dict[str, Any]]]:
+    timeout = time_left(SEARCH_TIMEOUT)
     try:
         service = build("customsearch", "v1", developerKey=GOOGLE_API_KEY)
         
-        # Добавляем "ИТМО" к запросу для более релевантных результатов
-        search_query = f"ИТМО {query}"
-        
         def execute_search():
             return service.cse().list(
                 q=search_query,
@@ -31,7 +166,7 @@ async def search_itmo_info(query: str) -> List[Dict[str, Any]]:
             ).execute()
         
         # Используем общий таймаут для всей операции поиска
-        result = await asyncio.wait_for(asyncio.get_event_loop().run_in_executor(_executor, execute_search), timeout=SEARCH_TIMEOUT)
+        result = await asyncio.wait_for(asyncio.get_event_loop().run_in_executor(_executor, execute_search), timeout=timeout)
         
         if "items" not in result:
             return []
@@ -43,22 +178,24 @@ async def search_itmo_info(query: str) -> List[Dict[str, Any]]:
         } for item in result["items"]]
     
     except asyncio.TimeoutError:
-        logger.error(f"Search timed out after {SEARCH_TIMEOUT} seconds")
-        return []
+        logger.error(f"Search timed out after {timeout:.1f} seconds")
+        return None
     except HttpError as e:
         logger.error(f"Error performing Google search: {str(e)}")
-        return []
+        return None
     except Exception as e:
         logger.error(f"Unexpected error during search: {str(e)}")
-        return []
+        return None
 
 async def search_google(query: str) -> List[str]:
     try:
         results = await search_itmo_info(query)
+        passages = await enrich_results(results, query, time_left(ENRICH_CUTOFF))
         context = []
         
         for item in results:
-            context_item = f"{item['title']}\n{item['snippet']}\nИсточник: {item['link']}"
+            text = "\n".join([item['snippet']] + passages.get(item['link'], []))
+            context_item = f"{item['title']}\n{text}\nИсточник: {item['link']}"
             context.append(context_item)
         
         return context
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import re
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config.settings import (
+    CACHE_TTL,
+    SEMANTIC_ENABLED,
+    SEMANTIC_MODEL,
+    SEMANTIC_DIM,
+    SEMANTIC_MAX_PASSAGES,
+    SEMANTIC_MAX_QUESTIONS,
+    SEMANTIC_TOP_K,
+    SEMANTIC_MIN_SCORE,
+    SEMANTIC_DUP_THRESHOLD
+)
+from services.answer_check import OPTION_PATTERN, parse_options
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+except ImportError:  # без numpy семантический уровень просто выключен
+    np = None
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def _stem(word: str) -> str:
+    return word if word.isdigit() else word[:5]
+
+
+# Служебные и вопросительные слова, которые перефразирование свободно меняет местами
+QUESTION_STEMS = frozenset(_stem(word) for word in (
+    "в во о об про на за и у с по для ли что как какой какая какое какие каком каких когда где кто "
+    "сколько количество год году расскажите опишите известно есть является университет"
+).split())
+
+
+def _normalize(text: str) -> str:
+    return " ".join(WORD_PATTERN.findall(text.lower().replace('ё', 'е')))
+
+
+def _content_stems(query: str) -> frozenset:
+    return frozenset(_stem(word) for word in _normalize(question_stem(query)).split()) - QUESTION_STEMS
+
+
+def _same_question(stems: frozenset, stored: frozenset) -> bool:
+    # Близкие векторы дают и вопросы, отличающиеся одним словом ("ректор"/"проректор", #51/#52).
+    # Повтором считаем только вопрос без новых значимых слов, потерявший не больше одного
+    added, removed = stems - stored, stored - stems
+    return not added and len(removed) <= 1 and not any(stem.isdigit() for stem in removed)
+
+
+def question_stem(query: str) -> str:
+    # Варианты ответов сравниваются отдельно, в вектор идёт только сам вопрос
+    return OPTION_PATTERN.sub("", query).strip()
+
+
+class HashingEmbedder:
+    """Векторизатор без модели: слова (с грубым стеммингом) и символьные триграммы,
+    разложенные хешированием по dim координатам со знаком."""
+
+    def __init__(self, dim: int = SEMANTIC_DIM):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        features = []
+        for word in _normalize(text).split():
+            features.append(f"w:{_stem(word)}")
+            padded = f"<{word}>"
+            features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            digests = np.fromiter(
+                (zlib.crc32(feature.encode("utf-8")) for feature in self._features(text)),
+                dtype=np.uint32
+            )
+            signs = np.where(digests & 0x80000000, 1.0, -1.0).astype(np.float32)
+            np.add.at(vectors[row], digests % self.dim, signs)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+class ModelEmbedder:
+    """Небольшая модель sentence-transformers на CPU, если она установлена."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        return self.model.encode(list(texts), batch_size=32, normalize_embeddings=True).astype(np.float32)
+
+
+class VectorIndex:
+    """Индекс на numpy: косинусная близость нормированных векторов, пакетный top-k поиск.
+
+    Хранилище растёт удвоением до max_items, после чего новые записи вытесняют самые старые.
+    """
+
+    def __init__(self, dim: int, max_items: int):
+        self.dim = dim
+        self.max_items = max_items
+        self._vectors = np.zeros((min(64, max_items), dim), dtype=np.float32)
+        self._metas: List[Any] = []
+        self._slot_keys: List[str] = []
+        self._keys: Dict[str, int] = {}
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self._metas)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def add(self, keys: Sequence[str], vectors: "np.ndarray", metas: Sequence[Any]) -> None:
+        for key, vector, meta in zip(keys, vectors, metas):
+            if key in self._keys:
+                self._metas[self._keys[key]] = meta
+                continue
+            if len(self._metas) < self.max_items:
+                if len(self._metas) == len(self._vectors):
+                    grown = np.zeros((min(len(self._vectors) * 2, self.max_items), self.dim), dtype=np.float32)
+                    grown[:len(self._vectors)] = self._vectors
+                    self._vectors = grown
+                position = len(self._metas)
+                self._metas.append(meta)
+                self._slot_keys.append(key)
+            else:
+                position = self._next
+                self._next = (self._next + 1) % self.max_items
+                del self._keys[self._slot_keys[position]]
+                self._metas[position] = meta
+                self._slot_keys[position] = key
+            self._vectors[position] = vector
+            self._keys[key] = position
+
+    def search(self, queries: "np.ndarray", k: int) -> List[List[Tuple[float, Any]]]:
+        size = len(self._metas)
+        if not size:
+            return [[] for _ in range(len(queries))]
+        k = min(k, size)
+        scores = queries @ self._vectors[:size].T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[row, candidates])]
+            results.append([(float(scores[row, i]), self._metas[i]) for i in ordered])
+        return results
+
+
+def _create_embedder():
+    if SEMANTIC_MODEL:
+        try:
+            return ModelEmbedder(SEMANTIC_MODEL)
+        except Exception as e:
+            logger.warning(f"Failed to load embedding model {SEMANTIC_MODEL}, using hashing vectorizer: {str(e)}")
+    return HashingEmbedder()
+
+
+enabled = SEMANTIC_ENABLED and np is not None
+embedder = _create_embedder() if enabled else None
+passage_index = VectorIndex(embedder.dim, SEMANTIC_MAX_PASSAGES) if enabled else None
+question_index = VectorIndex(embedder.dim, SEMANTIC_MAX_QUESTIONS) if enabled else None
+
+
+async def _embed(texts: Sequence[str]) -> "np.ndarray":
+    if isinstance(embedder, ModelEmbedder):
+        # Модель считает десятки и сотни миллисекунд, event loop на это время не блокируем
+        return await asyncio.to_thread(embedder.embed, texts)
+    return embedder.embed(texts)
+
+
+async def index_passages(passages: List[str]) -> None:
+    if not enabled:
+        return
+    new = [passage for passage in dict.fromkeys(passages) if passage and passage not in passage_index]
+    if new:
+        passage_index.add(new, await _embed(new), new)
+
+
+async def related_passages(query: str, exclude: Sequence[str] = (), k: int = SEMANTIC_TOP_K) -> List[str]:
+    if not enabled or not len(passage_index):
+        return []
+    excluded = set(exclude)
+    hits = passage_index.search(await _embed([question_stem(query)]), k + len(excluded))[0]
+    return [passage for score, passage in hits if score >= SEMANTIC_MIN_SCORE and passage not in excluded][:k]
+
+
+async def remember_answer(query: str, response: Dict[str, Any]) -> None:
+    if not enabled:
+        return
+    stem = question_stem(query)
+    options = {number: _normalize(text) for number, text in parse_options(query).items()}
+    meta = {"options": options, "stems": _content_stems(query), "response": response, "stored_at": time.time()}
+    question_index.add([_normalize(query)], await _embed([stem]), [meta])
+
+
+async def find_similar_answer(query: str) -> Optional[Dict[str, Any]]:
+    """Ответ на ранее заданный вопрос, почти совпадающий с текущим.
+
+    Для вопросов с вариантами наборы вариантов должны совпадать; номер ответа
+    пересчитывается, если варианты перечислены в другом порядке. Значимые слова
+    вопроса тоже сверяются, иначе близкими оказываются вопросы с одной заменой.
+    """
+    if not enabled or not len(question_index):
+        return None
+    options = {number: _normalize(text) for number, text in parse_options(query).items()}
+    stems = _content_stems(query)
+    for score, meta in question_index.search(await _embed([question_stem(query)]), 3)[0]:
+        if score < SEMANTIC_DUP_THRESHOLD:
+            break
+        # Ответ живёт не дольше кэша ответов, иначе повтор продлевал бы устаревший ответ
+        if time.time() - meta["stored_at"] > CACHE_TTL:
+            continue
+        if set(meta["options"].values()) != set(options.values()) or not _same_question(stems, meta["stems"]):
+            continue
+        response = dict(meta["response"])
+        if options and response.get("answer") in meta["options"]:
+            text = meta["options"][response["answer"]]
+            response["answer"] = next(number for number, option in options.items() if option == text)
+        return response
+    return None
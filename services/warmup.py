@@ -0,0 +1,195 @@
+"""Прогрев кэша ответов заранее известными вопросами.
+
+Фоновая задача включается, если задан WARMUP_FILE или WARMUP_WINDOWS. В окнах пиковой
+нагрузки (и за WARMUP_LEAD до них; без окон - всегда) она прогоняет через обычный
+конвейер вопросы из WARMUP_FILE и популярные вопросы из кэша, если их ответ
+отсутствует или истекает меньше чем через WARMUP_REFRESH_BEFORE секунд.
+
+Разовый прогрев из командной строки:
+    python -m services.warmup config/warmup_questions.json --concurrency 4
+"""
+import argparse
+import asyncio
+import json
+import logging
+import runpy
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from config.settings import (
+    WARMUP_FILE,
+    WARMUP_WINDOWS,
+    WARMUP_UTC_OFFSET,
+    WARMUP_LEAD,
+    WARMUP_CHECK_INTERVAL,
+    WARMUP_CONCURRENCY,
+    WARMUP_CACHE_TTL,
+    WARMUP_REFRESH_BEFORE,
+    WARMUP_HOT_LIMIT,
+    WARMUP_TIMEOUT,
+    WARMUP_TENANT
+)
+from services.cache import cached_ttl, get_cache_key, popular_queries, redis_client
+from services.enrich import close_enricher
+from services.news import aggregator, get_itmo_news
+from services.pipeline import answer_from_context, collect_context, store_answer
+from services.ratelimit import QueueFull, check_rate_limit, fair_queue, tenant_limits
+from services.search import quota_remaining, search_google
+from utils.deadline import reset_deadline, set_deadline
+
+logger = logging.getLogger(__name__)
+
+
+def load_questions(path: str) -> List[str]:
+    if path.endswith(".py"):
+        # Списки вопросов в модуле, например tests/test_queries.py
+        values = [value for name, value in runpy.run_path(path).items() if name.isupper() and isinstance(value, list)]
+        items = [item for value in values for item in value]
+    elif path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            items = json.load(f)
+    else:
+        with open(path, encoding="utf-8") as f:
+            items = f.read().split("\n\n")
+    questions = [item["query"] if isinstance(item, dict) else item for item in items]
+    return list(dict.fromkeys(question.strip() for question in questions if isinstance(question, str) and question.strip()))
+
+
+def _parse_windows(spec: str) -> List[Tuple[int, int]]:
+    windows = []
+    for part in filter(None, (part.strip() for part in spec.split(","))):
+        start, end = (int(hours) * 60 + int(minutes) for hours, minutes in (t.split(":") for t in part.split("-")))
+        windows.append((start, end))
+    return windows
+
+
+def in_warm_window(windows: List[Tuple[int, int]], now: Optional[datetime] = None) -> bool:
+    if not windows:
+        return True
+    local = (now or datetime.utcnow()) + timedelta(hours=WARMUP_UTC_OFFSET)
+    minute = local.hour * 60 + local.minute
+    lead = WARMUP_LEAD // 60
+    # Окно может переходить через полночь, поэтому считаем по модулю суток
+    return any((minute - start + lead) % 1440 < (end - start) % 1440 + lead for start, end in windows)
+
+
+class WarmupJob:
+    def __init__(self, path: Optional[str] = WARMUP_FILE, windows: str = WARMUP_WINDOWS):
+        self.path = path
+        self.windows = _parse_windows(windows)
+        self.questions: List[str] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        # Каждый пересчёт стоит вызова модели и запроса к CSE, поэтому фоновый прогрев
+        # включается только явно: файлом вопросов или окнами пиковой нагрузки
+        if not self.path and not self.windows:
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def load(self) -> None:
+        if not self.path:
+            return
+        try:
+            self.questions = load_questions(self.path)
+            logger.info(f"Loaded {len(self.questions)} warm-up questions from {self.path}")
+        except Exception as e:
+            logger.error(f"Failed to load warm-up questions from {self.path}: {str(e)}")
+
+    async def _run(self) -> None:
+        self.load()
+        while True:
+            if in_warm_window(self.windows):
+                queries = list(dict.fromkeys(self.questions + popular_queries(WARMUP_HOT_LIMIT)))
+                stats = await self.warm(queries)
+                if stats["warmed"] or stats["failed"]:
+                    logger.info(f"Warm-up pass: {dict(stats)}")
+            await asyncio.sleep(WARMUP_CHECK_INTERVAL)
+
+    async def warm(self, queries: List[str], force: bool = False, concurrency: int = WARMUP_CONCURRENCY) -> Counter:
+        stats: Counter = Counter()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(query: str) -> None:
+            async with semaphore:
+                stats[await self._warm_one(query, force)] += 1
+
+        await asyncio.gather(*[bounded(query) for query in queries])
+        return stats
+
+    async def _claim(self, query: str) -> bool:
+        # Не даём воркерам gunicorn и ручному запуску считать один и тот же вопрос одновременно
+        try:
+            return bool(await redis_client.set(f"warmup:{get_cache_key(query)}", 1, nx=True, ex=WARMUP_TIMEOUT))
+        except Exception:
+            return True
+
+    async def _warm_one(self, query: str, force: bool) -> str:
+        if not force and await cached_ttl(query) > WARMUP_REFRESH_BEFORE:
+            return "fresh"
+        if await quota_remaining() <= 0:
+            return "skipped"
+        if not await self._claim(query):
+            return "skipped"
+        while True:
+            allowed, retry_after = await check_rate_limit(WARMUP_TENANT)
+            if allowed:
+                break
+            await asyncio.sleep(retry_after)
+
+        deadline_token = set_deadline(WARMUP_TIMEOUT)
+        news_task = search_task = None
+        try:
+            # Прогрев встаёт в ту же справедливую очередь с низким весом и уступает живым запросам.
+            # Поиск запускаем только после получения слота, чтобы отказ не тратил квоту
+            await fair_queue.acquire(WARMUP_TENANT, tenant_limits(WARMUP_TENANT)["weight"])
+            try:
+                news_task = asyncio.create_task(get_itmo_news())
+                search_task = asyncio.create_task(search_google(query))
+                context = await collect_context(query, news_task, search_task)
+                answer = await answer_from_context(query, context)
+                await store_answer(query, answer, WARMUP_CACHE_TTL)
+            finally:
+                fair_queue.release()
+            return "warmed"
+        except QueueFull:
+            return "skipped"
+        except Exception as e:
+            logger.error(f"Failed to warm up answer for {query[:80]!r}: {str(e)}")
+            return "failed"
+        finally:
+            for task in (news_task, search_task):
+                if task is not None:
+                    task.cancel()
+            reset_deadline(deadline_token)
+
+
+warmup_job = WarmupJob()
+
+
+async def _main(args: argparse.Namespace) -> None:
+    job = WarmupJob(args.path)
+    job.load()
+    # Фоновый опрос лент в этом процессе не запущен, берём новости один раз
+    await aggregator.refresh()
+    try:
+        stats = await job.warm(job.questions, force=args.force, concurrency=args.concurrency)
+    finally:
+        await close_enricher()
+    print(f"Warm-up of {len(job.questions)} questions finished: {dict(stats)}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Fill the answer cache with precomputed answers")
+    parser.add_argument("path", help="question file: .json, .py or text with blank-line separated questions")
+    parser.add_argument("--concurrency", type=int, default=WARMUP_CONCURRENCY)
+    parser.add_argument("--force", action="store_true", help="recompute answers that are still fresh")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,79 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import ANSWER_MIN_CONFIDENCE
+from services.answer_check import _coerce_answer, select_context, validate_answer
+
+QUERY = ("В каком году Университет ИТМО был включён в число Национальных исследовательских университетов России?\n"
+         "1. 2007\n2. 2009\n3. 2011\n4. 2015")
+OPTIONS = {1: "2007", 2: "2009", 3: "2011", 4: "2015"}
+CONTEXT = "Университет ИТМО получил статус национального исследовательского университета в 2009 году."
+
+# (значение из ответа модели, ожидаемый номер варианта)
+COERCE_CASES = [
+    (2, 2),
+    ("3", 3),
+    (" 4. ", 4),
+    (2009, 2),  # модель вернула сам вариант вместо номера
+    ("2011", 3),
+    (5, None),
+    (0, None),
+    ("второй", None),
+    ("2.5", None),
+    (None, None),
+    (True, None),
+    ([2], None),
+]
+
+# (ответ модели, контекст, ожидаемый номер, нужен ли повторный запрос)
+VALIDATE_CASES = [
+    ({"answer": 2, "reasoning": "ИТМО вошёл в число НИУ в 2009 году."}, "", 2, False),
+    ({"answer": 2, "reasoning": "Это произошло во второй волне конкурса."}, "", 2, False),
+    # Объяснение противоречит номеру: ответ модели не подменяем, но переспрашиваем
+    ({"answer": 2, "reasoning": "Программа НИУ стартовала в 2007 году, ИТМО вошёл во вторую волну"}, "", 2, True),
+    ({"answer": "2009", "reasoning": ""}, "", 2, False),
+    ({"answer": None, "reasoning": "Правильный ответ - 2009 год."}, "", 2, False),
+    ({"answer": 7, "reasoning": "Не уверен."}, CONTEXT, 2, True),
+    ({"answer": None, "reasoning": "Не уверен."}, "", None, True),
+    ({"answer": None, "reasoning": "Это было в 2007 или 2009 году."}, "", None, True),
+]
+
+
+def test_coerce_answer():
+    for raw, expected in COERCE_CASES:
+        assert _coerce_answer(raw, OPTIONS) == expected, (raw, expected)
+
+
+def test_validate_answer():
+    for response, context, expected, reask in VALIDATE_CASES:
+        checked = validate_answer(QUERY, response, context)
+        assert checked["answer"] == expected, (response, checked)
+        assert (checked["confidence"] < ANSWER_MIN_CONFIDENCE) == reask, (response, checked)
+
+
+def test_validate_answer_without_options():
+    checked = validate_answer("Расскажите о библиотеке ИТМО", {"answer": 3, "reasoning": "..."})
+    assert checked == {"answer": None, "confidence": 1.0}
+
+
+def test_select_context_prefers_relevant_passages():
+    news = [f"Новость {i}\nВ ИТМО прошёл день открытых дверей и хакатон для школьников.\nИсточник: https://news.itmo.ru/{i}"
+            for i in range(6)]
+    context = "\n\n".join(news + [CONTEXT, "Кампус на Кронверкском проспекте\nИсточник: https://itmo.ru/campus"])
+    selected = select_context(QUERY, context, 300)
+    assert len(selected) <= 300
+    assert selected.startswith(CONTEXT), selected
+    # Простое усечение оставило бы только новости
+    assert CONTEXT not in context[:300]
+    assert select_context(QUERY, "x" * 500, 300) == "x" * 300
+    assert select_context(QUERY, "", 300) == ""
+
+
+if __name__ == "__main__":
+    test_coerce_answer()
+    test_validate_answer()
+    test_validate_answer_without_options()
+    test_select_context_prefers_relevant_passages()
+    print("Answer validation checks passed")
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from services import cache
+
+QUERY = "Сколько стоит общежитие ИТМО?"
+BODY = b'{"answer":null,"reasoning":"..."}'
+
+
+class FakePipeline:
+    def __init__(self, data):
+        self.data = data
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def get(self, key):
+        self.commands.append(lambda: self.data.get(key, (None, -2))[0])
+        return self
+
+    def pttl(self, key):
+        self.commands.append(lambda: self.data.get(key, (None, -2))[1])
+        return self
+
+    async def execute(self):
+        return [command() for command in self.commands]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}  # ключ -> (значение, PTTL в мс)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self.data)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(cache, "redis_raw_client", fake)
+    monkeypatch.setattr(cache, "_answer_cache", cache.LocalTTLCache(16, cache.CACHE_TTL))
+    monkeypatch.setattr(cache, "_popularity", cache.Counter())
+    monkeypatch.setattr(cache, "_popular_queries", {})
+    return fake
+
+
+@pytest.mark.parametrize("pttl, expected", [
+    (30_000, 30),
+    (-1, cache.CACHE_TTL),  # ключ без срока жизни
+    (0, None),
+])
+def test_redis_hit_keeps_remaining_ttl(redis, pttl, expected):
+    key = cache.get_cache_key(QUERY)
+    redis.data[key] = (BODY, pttl)
+    assert asyncio.run(cache.get_cached_response(QUERY)) == BODY
+    expires_in = cache._answer_cache.expires_in(key)
+    if expected is None:
+        assert expires_in is None
+    else:
+        assert expected - 1 < expires_in <= expected
+
+
+def test_redis_miss(redis):
+    assert asyncio.run(cache.get_cached_response(QUERY)) is None
+    assert cache._answer_cache.expires_in(cache.get_cache_key(QUERY)) is None
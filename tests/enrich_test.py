@@ -0,0 +1,109 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import enrich
+
+PAGE = """<html><head><title>ИТМО</title><script>var tracking = "не должно попасть в текст";</script></head>
+<body>
+<nav>Главная | Новости | Контакты | Поступающим | Студентам | Сотрудникам</nav>
+<article>
+<h1>История университета</h1>
+<p>Университет ИТМО был включён в число Национальных исследовательских университетов России в 2009 году.</p>
+<p>Команда университета семь раз становилась чемпионом мира по программированию ICPC.</p>
+</article>
+<footer>© Университет ИТМО, все права защищены, 1900-2024</footer>
+</body></html>"""
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/page.html" and self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        if self.path == "/page.html":
+            body = PAGE.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+async def run_checks(base_url: str):
+    query = "В каком году ИТМО стал национальным исследовательским университетом?"
+    results = [
+        {"title": "История", "link": f"{base_url}/page.html", "snippet": ""},
+        {"title": "Большая страница", "link": f"{base_url}/large.html", "snippet": ""},
+        {"title": "Нет страницы", "link": f"{base_url}/missing.html", "snippet": ""},
+    ]
+
+    passages = await enrich.enrich_results(results, query, timeout=5)
+    page_passages = passages[f"{base_url}/page.html"]
+    text = "\n".join(page_passages)
+    assert "2009 году" in text, text
+    assert "tracking" not in text and "Контакты" not in text, text
+    assert f"{base_url}/large.html" not in passages, "page above the size cap must be skipped"
+    assert f"{base_url}/missing.html" not in passages
+
+    # Просроченная запись перепроверяется по ETag и переиспользуется после 304
+    entry = enrich._page_cache.get(f"{base_url}/page.html")
+    enrich._page_cache.set(f"{base_url}/page.html", {**entry, "fetched_at": 0})
+    passages = await enrich.enrich_results(results[:1], query, timeout=5)
+    assert passages[f"{base_url}/page.html"] == page_passages
+    assert (("/page.html", '"v1"') in _Handler.requests_seen), _Handler.requests_seen
+
+    # Свежая запись отдаётся из кэша без запроса к серверу
+    seen = len(_Handler.requests_seen)
+    await enrich.enrich_results(results[:1], query, timeout=5)
+    assert len(_Handler.requests_seen) == seen
+
+    # Предзагрузка перепроверяет запись, которая устареет до следующего прохода
+    url = f"{base_url}/page.html"
+    age = enrich.ENRICH_CACHE_TTL - enrich.ENRICH_PREFETCH_INTERVAL // 2
+    enrich._page_cache.set(url, {**enrich._page_cache.get(url), "fetched_at": time.time() - age})
+    await enrich.get_passages(url)
+    assert len(_Handler.requests_seen) == seen
+    await enrich.get_passages(url, enrich.ENRICH_CACHE_TTL - enrich.ENRICH_PREFETCH_INTERVAL)
+    assert len(_Handler.requests_seen) == seen + 1
+    assert time.time() - enrich._page_cache.get(url)["fetched_at"] < 5
+
+    # Нулевой бюджет не ждёт загрузок
+    assert await enrich.enrich_results(results, query, timeout=0) == {}
+
+    await enrich.close_enricher()
+
+
+def test_enrich_local_server():
+    with tempfile.TemporaryDirectory() as root:
+        with open(os.path.join(root, "large.html"), "w") as f:
+            f.write("<p>" + "x" * (enrich.ENRICH_MAX_BYTES + 1) + "</p>")
+        server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_Handler, directory=root))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            asyncio.run(run_checks(f"http://127.0.0.1:{server.server_port}"))
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    test_enrich_local_server()
+    print("Enrichment checks passed")
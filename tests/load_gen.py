@@ -0,0 +1,293 @@
+"""Open-loop load generator for the /api/request endpoint.
+
+Requests are sent on a precomputed arrival schedule (constant, Poisson or
+step), regardless of how many earlier requests are still in flight. Latency
+is measured from each request's *scheduled* start, so queuing in the service
+or in the client itself shows up in the numbers instead of silently slowing
+the arrival rate down (coordinated omission).
+
+Examples:
+    python load_gen.py --rate 2 --duration 60
+    python load_gen.py --schedule poisson --rate 5 --duration 120 --json run.json
+    python load_gen.py --schedule step --step-rates 1,2,4,8 --step-duration 30 --csv run.csv
+    python load_gen.py --mix with_options=3,without_options=1 --compare baseline.json
+"""
+import argparse
+import asyncio
+import csv
+import json
+import math
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from test_queries import BASIC_QUESTIONS, DETAILED_QUESTIONS, QUERIES_WITH_OPTIONS, QUERIES_WITHOUT_OPTIONS
+
+API_URL = "https://itmo-ai.onrender.com/api/request"
+TIMEOUT = 420  # 7 минут в секундах
+PERCENTILES = (50, 90, 99, 99.9)
+
+QUERY_SETS = {
+    "with_options": [query["query"] for query in QUERIES_WITH_OPTIONS],
+    "without_options": [query["query"] for query in QUERIES_WITHOUT_OPTIONS],
+    "detailed": DETAILED_QUESTIONS,
+    "basic": BASIC_QUESTIONS,
+}
+
+
+class LatencyHistogram:
+    """HDR-style histogram of latencies in microseconds.
+
+    Values are grouped into log-linear buckets: every power of two is split into
+    2**sub_bucket_bits sub-buckets, so the relative error stays below 2**-sub_bucket_bits
+    at any magnitude while memory stays proportional to the number of distinct buckets.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 7):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.counts: Counter = Counter()
+        self.total = 0
+        self.sum = 0
+        self.min: Optional[int] = None
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        if value < 2 * self.sub_bucket_count:
+            return value
+        exponent = value.bit_length() - self.sub_bucket_bits - 1
+        return exponent * self.sub_bucket_count + (value >> exponent)
+
+    def _highest_equivalent(self, index: int) -> int:
+        if index < 2 * self.sub_bucket_count:
+            return index
+        exponent = index // self.sub_bucket_count - 1
+        mantissa = index - exponent * self.sub_bucket_count
+        return ((mantissa + 1) << exponent) - 1
+
+    def record(self, seconds: float) -> None:
+        value = max(0, int(seconds * 1_000_000))
+        self.counts[self._index(value)] += 1
+        self.total += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, percentile: float) -> float:
+        if not self.total:
+            return 0.0
+        target = max(1, math.ceil(self.total * percentile / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._highest_equivalent(index), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def summary(self) -> Dict[str, float]:
+        result = {f"p{p:g}": round(self.percentile(p), 4) for p in PERCENTILES}
+        result.update({
+            "min": round((self.min or 0) / 1_000_000, 4),
+            "mean": round(self.sum / self.total / 1_000_000, 4) if self.total else 0.0,
+            "max": round(self.max / 1_000_000, 4),
+            "count": self.total,
+        })
+        return result
+
+
+def build_schedule(args: argparse.Namespace, rng: random.Random) -> List[Tuple[float, int]]:
+    """Returns (offset from start in seconds, step number) for every request."""
+    if args.schedule == "step":
+        steps = [(float(rate), args.step_duration) for rate in args.step_rates.split(",")]
+    else:
+        steps = [(args.rate, args.duration)]
+
+    schedule = []
+    step_start = 0.0
+    for step, (rate, duration) in enumerate(steps):
+        offset = 0.0
+        while True:
+            if args.schedule == "poisson":
+                offset += rng.expovariate(rate)
+            elif schedule and schedule[-1][1] == step:
+                offset += 1 / rate
+            if offset >= duration:
+                break
+            schedule.append((step_start + offset, step))
+        step_start += duration
+    return schedule
+
+
+def parse_mix(mix: str) -> Tuple[List[str], List[float]]:
+    names, weights = [], []
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in QUERY_SETS:
+            raise SystemExit(f"Unknown query set '{name}', available: {', '.join(QUERY_SETS)}")
+        names.append(name)
+        weights.append(float(weight or 1))
+    return names, weights
+
+
+async def send_request(session: aiohttp.ClientSession, url: str, record: Dict[str, Any], started_at: float) -> None:
+    record["sent"] = time.monotonic() - started_at
+    try:
+        async with session.post(url, json={"id": record["id"], "query": record["query"]}) as response:
+            await response.read()
+            record["status"] = response.status
+            if response.status != 200:
+                record["error"] = (await response.text())[:200]
+    except asyncio.TimeoutError:
+        record["status"] = "timeout"
+        record["error"] = "timeout"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = str(e)[:200]
+    finished = time.monotonic() - started_at
+    # Задержка от запланированного момента учитывает ожидание в очереди клиента
+    record["latency"] = finished - record["scheduled"]
+    record["service_time"] = finished - record["sent"]
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    rng = random.Random(args.seed)
+    names, weights = parse_mix(args.mix)
+    schedule = build_schedule(args, rng)
+    records = []
+    for seq, (offset, step) in enumerate(schedule):
+        query_set = rng.choices(names, weights)[0]
+        records.append({
+            "id": args.id_start + seq,
+            "set": query_set,
+            "query": rng.choice(QUERY_SETS[query_set]),
+            "step": step,
+            "scheduled": offset,
+        })
+
+    print(f"Sending {len(records)} requests to {args.url} ({args.schedule} schedule, "
+          f"{schedule[-1][0] if schedule else 0:.1f}s)...")
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.connections)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        started_at = time.monotonic()
+        tasks = []
+        for record in records:
+            delay = started_at + record["scheduled"] - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send_request(session, args.url, record, started_at)))
+        await asyncio.gather(*tasks)
+    return records
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    latency, service = LatencyHistogram(), LatencyHistogram()
+    for record in records:
+        latency.record(record["latency"])
+        service.record(record["service_time"])
+    statuses = Counter(str(record["status"]) for record in records)
+    duration = max((record["scheduled"] + record["latency"] for record in records), default=0.0) \
+        - min((record["scheduled"] for record in records), default=0.0)
+    send_lag = max((record["sent"] - record["scheduled"] for record in records), default=0.0)
+    return {
+        "requests": len(records),
+        "successful": statuses.get("200", 0),
+        "statuses": dict(statuses),
+        "duration": round(duration, 2),
+        "max_send_lag": round(send_lag, 4),
+        "latency": latency.summary(),
+        "service_time": service.summary(),
+    }
+
+
+def print_summary(title: str, summary: Dict[str, Any]) -> None:
+    print(f"\n=== {title} ===")
+    print(f"Requests: {summary['requests']}, successful: {summary['successful']}, statuses: {summary['statuses']}")
+    print(f"Duration: {summary['duration']:.2f}s, max client send lag: {summary['max_send_lag'] * 1000:.1f}ms")
+    for name, label in (("latency", "Latency (from schedule)"), ("service_time", "Service time (from send)")):
+        stats = summary[name]
+        line = ", ".join(f"p{p:g}={stats[f'p{p:g}']:.3f}s" for p in PERCENTILES)
+        print(f"{label}: {line}, max={stats['max']:.3f}s, mean={stats['mean']:.3f}s")
+
+
+def compare(summary: Dict[str, Any], baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = json.load(f)["summary"]
+    print(f"\n=== Compared to {baseline_path} ===")
+    for key in [f"p{p:g}" for p in PERCENTILES] + ["max", "mean"]:
+        before, after = baseline["latency"][key], summary["latency"][key]
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"{key:>6}: {before:.3f}s -> {after:.3f}s ({change:+.1f}%)")
+    print(f"successful: {baseline['successful']}/{baseline['requests']} -> {summary['successful']}/{summary['requests']}")
+
+
+def write_outputs(args: argparse.Namespace, records: List[Dict[str, Any]], summary: Dict[str, Any],
+                  steps: List[Dict[str, Any]]) -> None:
+    if args.json:
+        config = {key: value for key, value in vars(args).items() if key not in ("json", "csv", "compare")}
+        with open(args.json, "w") as f:
+            json.dump({"config": config, "summary": summary, "steps": steps}, f, indent=2, ensure_ascii=False)
+        print(f"\nSummary written to {args.json}")
+    if args.csv:
+        fields = ["id", "set", "step", "scheduled", "sent", "latency", "service_time", "status", "error"]
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(records)
+        print(f"Per-request results written to {args.csv}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the ITMO bot API")
+    parser.add_argument("--url", default=API_URL)
+    parser.add_argument("--schedule", choices=("constant", "poisson", "step"), default="constant")
+    parser.add_argument("--rate", type=float, default=1.0, help="requests per second for constant/poisson")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds for constant/poisson")
+    parser.add_argument("--step-rates", default="1,2,4", help="comma-separated rates for the step schedule")
+    parser.add_argument("--step-duration", type=float, default=30.0, help="seconds per step")
+    parser.add_argument("--mix", default="with_options=1,without_options=1,detailed=1,basic=1",
+                        help=f"weighted query sets: {', '.join(QUERY_SETS)}")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT, help="per-request timeout in seconds")
+    parser.add_argument("--connections", type=int, default=0, help="connection limit, 0 for unlimited")
+    parser.add_argument("--id-start", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", help="write config and summary to this file")
+    parser.add_argument("--csv", help="write per-request results to this file")
+    parser.add_argument("--compare", help="summary JSON of a previous run to compare against")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    records = asyncio.run(run(args))
+    if not records:
+        print("Schedule is empty, nothing was sent")
+        return
+
+    summary = summarize(records)
+    print_summary("Overall", summary)
+    steps = []
+    if args.schedule == "step":
+        for step, rate in enumerate(args.step_rates.split(",")):
+            step_summary = summarize([record for record in records if record["step"] == step])
+            step_summary["rate"] = float(rate)
+            steps.append(step_summary)
+            print_summary(f"Step {step + 1} ({rate} req/s)", step_summary)
+
+    errors = Counter(record["error"] for record in records if record.get("error"))
+    if errors:
+        print("\nErrors:")
+        for error, count in errors.most_common(10):
+            print(f"  {count} x {error}")
+
+    write_outputs(args, records, summary, steps)
+    if args.compare:
+        compare(summary, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import news
+from services.news import NewsStore, _content_hash
+
+
+def _item(title, guid="", timestamp=0.0, summary="Новость университета"):
+    return {"title": title, "link": guid, "summary": summary, "published": "", "guid": guid,
+            "hash": _content_hash(title, summary), "timestamp": timestamp}
+
+
+def test_items_without_guid_deduplicated_by_content():
+    store = NewsStore(size=10, dedup_size=100)
+    assert store.add([_item("Первая"), _item("Вторая")]) == 2
+    # Пустой GUID не считается общим ключом для разных новостей
+    assert store.add([_item("Третья")]) == 1
+    # Та же новость с другой разметкой и пробелами
+    assert store.add([_item("  <b>ПЕРВАЯ</b> ")]) == 0
+    assert len(store) == 3
+
+
+def test_shared_hash_or_guid_is_a_duplicate():
+    store = NewsStore(size=10, dedup_size=100)
+    assert store.add([_item("Новость", guid="https://news.itmo.ru/1")]) == 1
+    # Та же новость из другой ленты под другим GUID
+    assert store.add([_item("Новость", guid="https://itmo.ru/news/1")]) == 0
+    # Обновлённый текст под тем же GUID
+    assert store.add([_item("Новость (обновлено)", guid="https://news.itmo.ru/1")]) == 0
+    assert [item["title"] for item in store.latest(10)] == ["Новость"]
+
+
+def test_eviction():
+    store = NewsStore(size=2, dedup_size=4)
+    store.add([_item("Старая", timestamp=1), _item("Новая", timestamp=3), _item("Средняя", timestamp=2)])
+    assert [item["title"] for item in store.latest(10)] == ["Новая", "Средняя"]
+    # Вытесненная из хранилища новость ещё помнится и не возвращается
+    assert store.add([_item("Старая", timestamp=1)]) == 0
+    # После вытеснения из окна дедупликации новость снова принимается
+    store.add([_item("Ещё одна"), _item("И ещё")])
+    assert store.add([_item("Старая", timestamp=4)]) == 1
+    assert store.latest(1)[0]["title"] == "Старая"
+
+
+def test_slow_source_does_not_delay_others(monkeypatch):
+    aggregator = news.NewsAggregator([{"name": "slow", "url": "slow", "interval": 60},
+                                      {"name": "fast", "url": "fast", "interval": 0.05}])
+    polls = []
+
+    async def fake_poll(session, source):
+        polls.append(source.name)
+        if source.name == "slow":
+            await asyncio.sleep(10)
+        source.next_poll = time.monotonic() + source.interval
+
+    monkeypatch.setattr(aggregator, "_poll", fake_poll)
+
+    async def run():
+        task = asyncio.create_task(aggregator._run())
+        await asyncio.sleep(0.3)
+        task.cancel()
+
+    asyncio.run(run())
+    assert polls.count("slow") == 1
+    assert polls.count("fast") >= 3
+
+
+if __name__ == "__main__":
+    test_items_without_guid_deduplicated_by_content()
+    test_shared_hash_or_guid_is_a_duplicate()
+    test_eviction()
+    print("News store checks passed")
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.enrich import extract_passages
+from services.news import _parse_feed
+from utils import offload
+
+INTERACTIVE_CLIENTS = 20  # имитация лёгких запросов, которым важна задержка
+INTERACTIVE_PERIOD = 0.005
+HEAVY_JOBS = 40  # разборы больших лент и страниц
+DURATION = 5.0
+
+
+def make_feed(items: int = 200) -> str:
+    entries = "".join(
+        f"<item><title>Новость ИТМО №{i}</title><link>https://news.itmo.ru/ru/news/{i}/</link>"
+        f"<description>{'Учёные Университета ИТМО разработали новый метод. ' * 20}</description>"
+        f"<pubDate>Mon, 0{i % 9 + 1} Jan 2024 10:00:00 +0300</pubDate></item>"
+        for i in range(items)
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>ИТМО</title>{entries}</channel></rss>'
+
+
+def make_page(paragraphs: int = 400) -> str:
+    body = "".join(f"<p>Абзац {i}: {'Университет ИТМО ведёт исследования в области фотоники. ' * 5}</p>" for i in range(paragraphs))
+    return f"<html><body><nav>Меню</nav><article>{body}</article></body></html>"
+
+
+async def interactive_client(latencies: List[float], stop_at: float):
+    while time.monotonic() < stop_at:
+        started = time.monotonic()
+        await asyncio.sleep(INTERACTIVE_PERIOD)
+        latencies.append(time.monotonic() - started - INTERACTIVE_PERIOD)
+
+
+async def heavy_worker(jobs: asyncio.Queue, feed: str, page: str):
+    while not jobs.empty():
+        job = jobs.get_nowait()
+        if job % 2:
+            await offload.run_cpu(_parse_feed, feed)
+        else:
+            await offload.run_cpu(extract_passages, page)
+        await asyncio.sleep(DURATION / HEAVY_JOBS)
+
+
+async def run_mixed_load(feed: str, page: str) -> List[float]:
+    latencies: List[float] = []
+    jobs: asyncio.Queue = asyncio.Queue()
+    for job in range(HEAVY_JOBS):
+        jobs.put_nowait(job)
+    stop_at = time.monotonic() + DURATION
+    await asyncio.gather(
+        *[interactive_client(latencies, stop_at) for _ in range(INTERACTIVE_CLIENTS)],
+        *[heavy_worker(jobs, feed, page) for _ in range(4)]
+    )
+    return latencies
+
+
+def report(name: str, latencies: List[float]):
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"{name:>10}: samples={len(latencies)} p50={p50:.2f}ms p99={p99:.2f}ms "
+          f"max={latencies[-1] * 1000:.2f}ms mean={statistics.mean(latencies) * 1000:.2f}ms")
+
+
+def main():
+    feed, page = make_feed(), make_page()
+    print(f"Feed: {len(feed) // 1024}KB, page: {len(page) // 1024}KB, "
+          f"{INTERACTIVE_CLIENTS} interactive clients, {HEAVY_JOBS} heavy jobs, {DURATION}s")
+
+    report("inline", asyncio.run(run_mixed_load(feed, page)))
+
+    offload.start_pool()
+    try:
+        report("offload", asyncio.run(run_mixed_load(feed, page)))
+    finally:
+        offload.stop_pool()
+
+
+if __name__ == "__main__":
+    main()
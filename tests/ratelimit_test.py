@@ -0,0 +1,150 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import ratelimit
+from services.ratelimit import FairQueue, QueueFull
+
+
+async def _hold(queue: FairQueue, tenant: str, order: list, weight: float = 1.0) -> None:
+    await queue.acquire(tenant, weight)
+    order.append(tenant)
+    await asyncio.sleep(0.01)
+    queue.release()
+
+
+async def check_zero_timeout_with_free_slot():
+    # Простаивающий сервер: слот занимается без ожидания, даже если на очередь не осталось времени
+    queue = FairQueue(concurrency=1, max_queued=2)
+    assert queue.try_acquire("a")
+    assert queue.active == 1
+    queue.release()
+    assert queue.active == 0
+
+    # Если слот занят, нулевой таймаут отменяет ожидание и не оставляет мусора в очереди
+    assert queue.try_acquire("a")
+    try:
+        await asyncio.wait_for(queue.acquire("b"), timeout=0)
+        raise AssertionError("acquire must time out while the slot is busy")
+    except asyncio.TimeoutError:
+        pass
+    assert queue.queued() == 0
+    queue.release()
+    assert queue.active == 0
+
+
+async def check_cancel_while_queued():
+    queue = FairQueue(concurrency=1, max_queued=2)
+    await queue.acquire("a")
+    waiter = asyncio.create_task(queue.acquire("b"))
+    await asyncio.sleep(0)
+    assert queue.queued("b") == 1
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    assert queue.queued() == 0
+    # Отменённый ожидающий пропускается, слот просто освобождается
+    queue.release()
+    assert queue.active == 0
+    assert queue.try_acquire("c")
+    queue.release()
+
+
+async def check_cancelled_after_handover():
+    # Слот уже передан ожидающему, но тот отменён до того, как успел проснуться
+    queue = FairQueue(concurrency=1, max_queued=2)
+    await queue.acquire("a")
+    first = asyncio.create_task(queue.acquire("b"))
+    second = asyncio.create_task(queue.acquire("c"))
+    await asyncio.sleep(0)
+    queue.release()
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+    # Слот должен перейти к следующему ожидающему, а не потеряться
+    await asyncio.wait_for(second, timeout=1)
+    assert queue.active == 1
+    queue.release()
+    assert queue.active == 0
+
+
+async def check_weighted_ordering():
+    queue = FairQueue(concurrency=1, max_queued=10)
+    await queue.acquire("busy")
+    order = []
+    tasks = [asyncio.create_task(_hold(queue, "busy", order)) for _ in range(4)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(_hold(queue, "quiet", order)))
+    tasks.extend(asyncio.create_task(_hold(queue, "heavy", order, weight=4.0)) for _ in range(4))
+    await asyncio.sleep(0)
+    queue.release()
+    await asyncio.gather(*tasks)
+    # Одиночный запрос не ждёт всю пачку, а клиент с весом 4 обслуживается чаще остальных
+    busy_turns = [i for i, tenant in enumerate(order) if tenant == "busy"]
+    assert order.index("quiet") < busy_turns[1], order
+    assert order[:4].count("heavy") >= 3, order
+    assert order.count("busy") == 4 and order.count("heavy") == 4, order
+    assert queue.active == 0 and queue.queued() == 0
+
+
+async def check_queue_full():
+    queue = FairQueue(concurrency=1, max_queued=1)
+    await queue.acquire("a")
+    waiter = asyncio.create_task(queue.acquire("a"))
+    await asyncio.sleep(0)
+    try:
+        await queue.acquire("a")
+        raise AssertionError("second queued request of the same tenant must be rejected")
+    except QueueFull:
+        pass
+    queue.release()
+    await waiter
+    queue.release()
+
+
+class _BrokenRedis:
+    async def eval(self, *args):
+        raise ConnectionError("redis is down")
+
+
+async def check_token_bucket():
+    results = [await ratelimit.check_rate_limit("bucket-test") for _ in range(3)]
+    assert [allowed for allowed, _ in results] == [True, True, False], results
+    assert 0 < results[2][1] <= 1, results
+
+    allowed, retry_after = ratelimit._take_local("refill", rate=10, burst=1)
+    assert allowed and retry_after == 0
+    allowed, retry_after = ratelimit._take_local("refill", rate=10, burst=1)
+    assert not allowed and 0 < retry_after <= 0.1
+    await asyncio.sleep(retry_after + 0.01)
+    assert ratelimit._take_local("refill", rate=10, burst=1)[0]
+
+
+def test_fair_queue():
+    for check in (check_zero_timeout_with_free_slot, check_cancel_while_queued,
+                  check_cancelled_after_handover, check_weighted_ordering, check_queue_full):
+        asyncio.run(check())
+
+
+def test_token_bucket(monkeypatch):
+    # Без Redis лимит считается локальным бакетом
+    monkeypatch.setattr(ratelimit, "redis_client", _BrokenRedis())
+    monkeypatch.setitem(ratelimit.TENANT_LIMITS, "bucket-test", {"rate": 1, "burst": 2})
+    monkeypatch.setattr(ratelimit, "_local_buckets", {})
+    asyncio.run(check_token_bucket())
+
+
+@pytest.mark.parametrize("api_key, client_id, forwarded_for, client_host, expected", [
+    ("partner", None, "10.0.0.1", "127.0.0.1", "partner"),
+    (None, "partner", None, "127.0.0.1", "partner"),
+    ("random-1", None, "10.0.0.1, 172.16.0.1", "127.0.0.1", "10.0.0.1"),
+    (None, "random-2", None, "127.0.0.1", "127.0.0.1"),
+    ("random-3", "partner", None, "127.0.0.1", "partner"),
+    (None, None, None, None, "anonymous"),
+])
+def test_resolve_tenant(monkeypatch, api_key, client_id, forwarded_for, client_host, expected):
+    # Неизвестный ключ из заголовка не создаёт отдельного клиента со своим бакетом
+    monkeypatch.setitem(ratelimit.TENANT_LIMITS, "partner", {"rate": 5, "burst": 50})
+    assert ratelimit.resolve_tenant(api_key, client_id, forwarded_for, client_host) == expected
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from services import search
+
+CACHED = [{"title": "ИТМО в рейтингах", "link": "https://itmo.ru/rating", "snippet": "Место ИТМО в рейтинге программной инженерии"}]
+FOUND = [{"title": "Новый результат", "link": "https://itmo.ru/new", "snippet": "Свежий ответ"}]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    async def expire(self, key, ttl):
+        pass
+
+
+@pytest.fixture
+def env(monkeypatch):
+    redis = FakeRedis()
+    calls = []
+
+    async def fake_cse(search_query):
+        calls.append(search_query)
+        return FOUND
+
+    monkeypatch.setattr(search, "redis_client", redis)
+    monkeypatch.setattr(search, "_search_cse", fake_cse)
+    monkeypatch.setattr(search, "_local_cache", search.LocalTTLCache(16, 3600))
+    monkeypatch.setattr(search, "_local_quota", {})
+    return redis, calls
+
+
+def _put_cached(redis, query, age):
+    key = search._search_cache_key(search.canonicalize_query(f"ИТМО {query}"))
+    entry = search._pack_results(CACHED)
+    entry["t"] = time.time() - age
+    redis.data[key] = json.dumps(entry)
+
+
+def _set_used(redis, used):
+    redis.data[search._quota_key()] = used
+
+
+def test_cse_gets_original_text_and_cache_uses_canonical_key(env):
+    redis, calls = env
+    query = "Какие треки у программы ИТМО.Старт для C++ и C#, места 51-100?"
+    assert asyncio.run(search.search_itmo_info(query)) == FOUND
+    assert calls == [f"ИТМО {query}"]
+    # Тот же вопрос в другом регистре и с другой пунктуацией берётся из кэша
+    assert asyncio.run(search.search_itmo_info(query.upper().replace("?", " "))) == FOUND
+    assert len(calls) == 1
+
+
+def test_fresh_entry_skips_cse(env):
+    redis, calls = env
+    _put_cached(redis, "рейтинг", age=0)
+    assert asyncio.run(search.search_itmo_info("рейтинг")) == CACHED
+    assert calls == []
+
+
+def test_stale_entry_refreshed_while_quota_is_available(env):
+    redis, calls = env
+    _put_cached(redis, "рейтинг", age=search.SEARCH_CACHE_TTL + 1)
+    assert asyncio.run(search.search_itmo_info("рейтинг")) == FOUND
+    assert len(calls) == 1
+    assert int(redis.data[search._quota_key()]) == 1
+
+
+def test_low_quota_serves_stale_entry(env):
+    redis, calls = env
+    _put_cached(redis, "рейтинг", age=search.SEARCH_CACHE_TTL + 1)
+    _set_used(redis, search.SEARCH_DAILY_QUOTA - search.SEARCH_QUOTA_RESERVE)
+    assert asyncio.run(search.search_itmo_info("рейтинг")) == CACHED
+    assert calls == []
+
+
+def test_low_quota_without_entry_still_searches(env):
+    redis, calls = env
+    _set_used(redis, search.SEARCH_DAILY_QUOTA - search.SEARCH_QUOTA_RESERVE)
+    assert asyncio.run(search.search_itmo_info("рейтинг")) == FOUND
+    assert len(calls) == 1
+
+
+def test_exhausted_quota_falls_back_to_local_index(env):
+    redis, calls = env
+    search._local_cache.set("search:итмо рейтинг", search._pack_results(CACHED))
+    _set_used(redis, search.SEARCH_DAILY_QUOTA)
+    assert asyncio.run(search.search_itmo_info("рейтинг программной инженерии")) == CACHED
+    search._local_cache._data.clear()
+    assert asyncio.run(search.search_itmo_info("рейтинг программной инженерии")) == []
+    assert calls == []
+
+
+def test_cse_failure_serves_stale_entry(env, monkeypatch):
+    redis, calls = env
+
+    async def failing_cse(search_query):
+        return None
+
+    monkeypatch.setattr(search, "_search_cse", failing_cse)
+    _put_cached(redis, "рейтинг", age=search.SEARCH_CACHE_TTL + 1)
+    assert asyncio.run(search.search_itmo_info("рейтинг")) == CACHED
+    assert asyncio.run(search.search_itmo_info("общежития")) == []
+
+
+def test_quota_counted_locally_without_redis(env, monkeypatch):
+    redis, calls = env
+
+    class BrokenRedis(FakeRedis):
+        async def get(self, key):
+            raise ConnectionError("redis is down")
+
+        async def incr(self, key):
+            raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(search, "redis_client", BrokenRedis())
+    for i in range(3):
+        asyncio.run(search.search_itmo_info(f"вопрос {i}"))
+    assert search._local_quota[search._quota_key()] == 3
+    assert asyncio.run(search.quota_remaining()) == search.SEARCH_DAILY_QUOTA - search.SEARCH_QUOTA_RESERVE - 3
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import random
+import re
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from services import semantic
+from services.answer_check import parse_options
+from test_queries import QUERIES_WITH_OPTIONS, QUERIES_WITHOUT_OPTIONS
+
+# Замены, которыми обычно перефразируют вопросы
+REWRITES = [
+    (r'^В каком году', 'Когда'),
+    (r'^Когда', 'В каком году'),
+    (r'^Сколько', 'Какое количество'),
+    (r'^Какое количество', 'Сколько'),
+    (r'^Расскажите о', 'Что известно о'),
+    (r'^Расскажите об', 'Что известно об'),
+    (r'^Опишите', 'Расскажите про'),
+    (r'^Какие', 'Что за'),
+    (r'\bИТМО\b', 'Университет ИТМО'),
+    (r'\bУниверситет ИТМО\b', 'ИТМО'),
+    (r'\?$', ''),
+]
+
+# Похожие по форме, но другие по смыслу вопросы: на них повтор находиться не должен
+NEGATIVES = [
+    "В каком году был основан Университет ИТМО?\n1. 1900\n2. 1930\n3. 1940\n4. 1950",
+    "Сколько факультетов в Университете ИТМО?\n1. 12\n2. 15\n3. 18\n4. 20",
+    "Кто является ректором Университета ИТМО?",
+    "Какой кампус является главным в Университете ИТМО?",
+    "Расскажите о приёмной комиссии ИТМО",
+    "Какие олимпиады проводит ИТМО для школьников?",
+    "Сколько стоит обучение в ИТМО?",
+    "Расскажите о столовых ИТМО",
+    # Отличаются от вопросов корпуса одним словом или числом
+    "Расскажите о спортивных направлениях ИТМО",
+    "Какие научные лаборатории есть в ИТМО?",
+    "Сколько общежитий у ИТМО?\n1. 5\n2. 7\n3. 9\n4. 11",
+    "В каком году ИТМО получил статус академии?\n1. 1992\n2. 1994\n3. 1996\n4. 1998",
+    "Какие международные конференции проводятся в ИТМО?",
+]
+
+# Пары (сохранённый вопрос, вопрос с минимальной правкой), на которые повтор находиться не должен
+MINIMAL_EDITS = [
+    ("Кто является ректором Университета ИТМО?", "Кто является проректором Университета ИТМО?"),
+    ("Тестовый вопрос без вариантов ответов #51", "Тестовый вопрос без вариантов ответов #52"),
+    ("Тестовый вопрос с вариантами ответов #21\n1. Вариант 1\n2. Вариант 2\n3. Вариант 3\n4. Вариант 4",
+     "Тестовый вопрос с вариантами ответов #22\n1. Вариант 1\n2. Вариант 2\n3. Вариант 3\n4. Вариант 4"),
+]
+
+
+def paraphrase(query: str, rng: random.Random) -> str:
+    stem, _, options = query.partition("\n")
+    for pattern, replacement in rng.sample(REWRITES, len(REWRITES)):
+        rewritten = re.sub(pattern, replacement, stem)
+        if rewritten != stem:
+            stem = rewritten
+            if rng.random() < 0.5:
+                break
+    words = stem.split()
+    if len(words) > 5 and rng.random() < 0.5:
+        words.pop(rng.randrange(1, len(words) - 1))
+    stem = " ".join(words)
+    if not options:
+        return stem
+    # Перемешиваем варианты, чтобы проверить пересчёт номера ответа
+    lines = [re.sub(r'^\d+\.\s*', '', line) for line in options.split("\n")]
+    rng.shuffle(lines)
+    return stem + "\n" + "\n".join(f"{i}. {line}" for i, line in enumerate(lines, 1))
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def run():
+    rng = random.Random(42)
+    # Сгенерированные "Тестовый вопрос #N" отличаются только номером, поэтому берём рукописные
+    corpus = [q["query"] for q in QUERIES_WITH_OPTIONS + QUERIES_WITHOUT_OPTIONS if q["id"] <= 20]
+    for query in corpus:
+        options = parse_options(query)
+        await semantic.remember_answer(query, {"answer": 1 if options else None, "reasoning": query})
+
+    hits = correct = remapped = 0
+    embed_times, lookup_times = [], []
+    paraphrases = [(query, paraphrase(query, rng)) for query in corpus for _ in range(5)]
+    for original, variant in paraphrases:
+        started = time.perf_counter()
+        vector = semantic.embedder.embed([semantic.question_stem(variant)])
+        embed_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        found = await semantic.find_similar_answer(variant)
+        lookup_times.append(time.perf_counter() - started)
+        top = semantic.question_index.search(vector, 1)[0][0][1]
+        correct += top["response"]["reasoning"] == original
+        if found is not None:
+            hits += 1
+            options = parse_options(variant)
+            if options:
+                expected = next(n for n, text in options.items() if text == parse_options(original)[1])
+                remapped += found["answer"] == expected
+            else:
+                remapped += found["reasoning"] == original
+
+    false_hits = sum([await semantic.find_similar_answer(query) is not None for query in NEGATIVES])
+    for stored, _ in MINIMAL_EDITS:
+        await semantic.remember_answer(stored, {"answer": None, "reasoning": stored})
+    false_hits += sum([await semantic.find_similar_answer(query) is not None for _, query in MINIMAL_EDITS])
+
+    print(f"Corpus: {len(corpus)} questions, {len(paraphrases)} paraphrases, "
+          f"embedder={type(semantic.embedder).__name__}, threshold={semantic.SEMANTIC_DUP_THRESHOLD}")
+    print(f"Top-1 retrieval accuracy: {correct / len(paraphrases):.1%}")
+    print(f"Near-duplicate hits: {hits / len(paraphrases):.1%}, correct answer among hits: {remapped}/{hits}")
+    print(f"False hits on unrelated and minimally edited questions: {false_hits}/{len(NEGATIVES) + len(MINIMAL_EDITS)}")
+    print(f"Embed latency: p50={percentile(embed_times, 0.5) * 1000:.3f}ms p99={percentile(embed_times, 0.99) * 1000:.3f}ms")
+    print(f"Lookup latency: p50={percentile(lookup_times, 0.5) * 1000:.3f}ms p99={percentile(lookup_times, 0.99) * 1000:.3f}ms")
+
+    # Пакетный поиск по заполненному индексу фрагментов
+    index = semantic.VectorIndex(semantic.embedder.dim, semantic.SEMANTIC_MAX_PASSAGES)
+    vectors = np.random.default_rng(0).standard_normal((semantic.SEMANTIC_MAX_PASSAGES, semantic.embedder.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    started = time.perf_counter()
+    index.add([str(i) for i in range(len(vectors))], vectors, list(range(len(vectors))))
+    insert_time = time.perf_counter() - started
+    queries = semantic.embedder.embed([variant for _, variant in paraphrases[:32]])
+    started = time.perf_counter()
+    index.search(queries, semantic.SEMANTIC_TOP_K)
+    search_time = time.perf_counter() - started
+    print(f"Index of {len(index)} passages: insert {insert_time * 1000:.1f}ms total, "
+          f"batched top-{semantic.SEMANTIC_TOP_K} search of {len(queries)} queries {search_time * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
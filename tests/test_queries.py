@@ -86,6 +86,46 @@ QUERIES_WITHOUT_OPTIONS = [
     }
 ]
 
+# Развёрнутые вопросы об ИТМО для нагрузочных тестов
+DETAILED_QUESTIONS = [
+    "Какой процент выпускников ИТМО трудоустраивается по специальности в первый год после выпуска?\n1. 65%\n2. 75%\n3. 85%\n4. 95%",
+    "Сколько научных лабораторий было создано в ИТМО в рамках программы мегагрантов?\n1. 12\n2. 15\n3. 18\n4. 21",
+    "Какое место занимает ИТМО в рейтинге QS по направлению Computer Science & Information Systems (2024)?\n1. 51-100\n2. 101-150\n3. 151-200\n4. 201-250",
+    "Сколько процентов составляют иностранные студенты от общего числа обучающихся в ИТМО?\n1. 10%\n2. 15%\n3. 20%\n4. 25%",
+    "В каком году была запущена программа ИТМО.Старт?\n1. 2016\n2. 2017\n3. 2018\n4. 2019",
+    
+    "Опишите структуру и основные направления исследований в международной лаборатории 'Информационные технологии в задачах управления' ИТМО",
+    "Какие преимущества дает участие в программе ИТМО.Family для иностранных абитуриентов и как это влияет на процесс поступления?",
+    "Расскажите о коллаборации ИТМО с MIT в области квантовых вычислений и фотоники. Какие основные результаты были достигнуты?",
+    "Опишите процесс коммерциализации научных разработок через Центр трансфера технологий ИТМО. Приведите успешные примеры",
+    "Как реализуется программа двойных дипломов между ИТМО и университетом Аалто (Финляндия)? Какие специальности доступны?",
+    
+    "Объясните принцип работы квантового компьютера, разрабатываемого в лаборатории квантовой информатики ИТМО",
+    "Какие технологии машинного обучения используются в проекте ИТМО по распознаванию эмоций в образовательном процессе?",
+    "Опишите архитектуру системы распределенных вычислений в суперкомпьютерном центре ИТМО",
+    
+    "Как в ИТМО реализуется концепция цифрового университета? Какие технологии и платформы используются?",
+    "Расскажите о проекте ИТМО по созданию метавселенной для образования. Какие технологии и подходы используются?",
+    
+    "Какие совместные научные проекты реализуются между ИТМО и Гарвардским университетом в области биоинформатики?",
+    "Опишите процесс организации международных научных конференций в ИТМО на примере METANANO",
+    
+    "Какие прорывные исследования ведутся в лаборатории метаматериалов ИТМО? Опишите последние достижения",
+    "Расскажите о разработках ИТМО в области квантовой криптографии и их практическом применении",
+    "Как исследования в области искусственного интеллекта в ИТМО влияют на развитие робототехники?"
+]
+
+# Короткие вопросы с вариантами ответов для нагрузочных тестов
+BASIC_QUESTIONS = [
+    "В каком году был основан Университет ИТМО?\n1. 1900\n2. 1930\n3. 1940\n4. 1950",
+    "Сколько факультетов в Университете ИТМО?\n1. 12\n2. 15\n3. 18\n4. 20",
+    "Кто является ректором Университета ИТМО?\n1. Владимир Васильев\n2. Владимир Николаев\n3. Александр Иванов\n4. Михаил Петров",
+    "Сколько раз команда Университета ИТМО становилась чемпионом мира по программированию ICPC?\n1. 6\n2. 7\n3. 8\n4. 9",
+    "В каком году Университет ИТМО был включён в число Национальных исследовательских университетов России?\n1. 2007\n2. 2009\n3. 2011\n4. 2015",
+    "Какой кампус является главным в Университете ИТМО?\n1. Кронверкский\n2. Ломоносова\n3. Биржевая линия\n4. Чайковского",
+    "Сколько научных лабораторий в Университете ИТМО?\n1. 50\n2. 75\n3. 100\n4. 150"
+]
+
 # Генерируем дополнительные вопросы с вариантами ответов
 for i in range(21, 51):
     QUERIES_WITH_OPTIONS.append({
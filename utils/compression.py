@@ -0,0 +1,84 @@
+import gzip
+from typing import List, Optional
+
+from config.settings import COMPRESSION_MIN_SIZE, GZIP_LEVEL, BROTLI_QUALITY
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен, без него отдаём gzip
+    brotli = None
+
+
+def _choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(name.strip().lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """ASGI middleware: сжимает ответы больше COMPRESSION_MIN_SIZE в br или gzip по Accept-Encoding.
+
+    Маленькие ответы (обычный ответ на один вопрос) уходят как есть - сжатие им не окупается.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        encoding = _choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        chunks: List[bytes] = []
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            response_headers = [
+                (name, value) for name, value in start_message.get("headers", [])
+                if name.lower() != b"content-length"
+            ]
+            already_encoded = any(name.lower() == b"content-encoding" for name, _ in response_headers)
+            if len(body) >= self.minimum_size and not already_encoded:
+                body = _compress(body, encoding)
+                response_headers.append((b"content-encoding", encoding.encode("latin-1")))
+                response_headers.append((b"vary", b"Accept-Encoding"))
+            response_headers.append((b"content-length", str(len(body)).encode("latin-1")))
+
+            await send({**start_message, "headers": response_headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
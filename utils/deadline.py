@@ -0,0 +1,42 @@
+import time
+from contextvars import ContextVar, Token
+from typing import Optional
+
+# Момент (по time.monotonic), к которому должен быть готов ответ на текущий запрос.
+# ContextVar копируется в задачи, созданные внутри запроса, поэтому дедлайн виден всем сервисам.
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def set_deadline(seconds: float) -> Token:
+    return _deadline.set(time.monotonic() + seconds)
+
+
+def reset_deadline(token: Token) -> None:
+    _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def scaled_reserve(reserve: float, fraction: float) -> float:
+    """Резерв на последний шаг, не больше заданной доли оставшегося бюджета."""
+    left = remaining()
+    if left is None:
+        return reserve
+    return min(reserve, left * fraction)
+
+
+def time_left(cap: float, reserve: float = 0.0) -> float:
+    """Таймаут для очередного вызова: не больше cap и не дальше дедлайна минус reserve."""
+    left = remaining()
+    if left is None:
+        return cap
+    return max(0.0, min(cap, left - reserve))
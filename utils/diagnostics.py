@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Optional
+
+from config.settings import (
+    LOOP_LAG_INTERVAL,
+    LOOP_LAG_WARN,
+    SLOW_CALLBACK_THRESHOLD,
+    SLOW_CALLBACK_HISTORY,
+    PROFILE_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class LoopMonitor:
+    """Измеряет задержку event loop и ловит зависшие колбэки.
+
+    Корутина монитора раз в LOOP_LAG_INTERVAL засыпает и сравнивает фактическое время
+    пробуждения с ожидаемым. Отдельный поток-сторож следит за пульсом монитора: если
+    loop не отвечает дольше SLOW_CALLBACK_THRESHOLD, снимается стек потока loop.
+    """
+
+    def __init__(self):
+        self.samples = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.histogram = [0] * (len(LAG_BUCKETS) + 1)
+        self.slow_callbacks: Deque[Dict[str, Any]] = deque(maxlen=SLOW_CALLBACK_HISTORY)
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _measure(self) -> None:
+        while True:
+            expected = time.monotonic() + LOOP_LAG_INTERVAL
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            now = time.monotonic()
+            self._heartbeat = now
+            self._record(max(0.0, now - expected))
+
+    def _record(self, lag: float) -> None:
+        self.samples += 1
+        self.last_lag = lag
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        bucket = next((i for i, bound in enumerate(LAG_BUCKETS) if lag <= bound), len(LAG_BUCKETS))
+        self.histogram[bucket] += 1
+        if lag > LOOP_LAG_WARN:
+            logger.warning(f"Event loop lag {lag * 1000:.0f}ms")
+
+    def _watch(self) -> None:
+        stalled_since = None
+        while not self._stop.wait(SLOW_CALLBACK_THRESHOLD / 2):
+            heartbeat = self._heartbeat
+            stall = time.monotonic() - heartbeat - LOOP_LAG_INTERVAL
+            if stall < SLOW_CALLBACK_THRESHOLD:
+                stalled_since = None
+                continue
+            # Один снимок стека на каждое зависание
+            if stalled_since == heartbeat:
+                continue
+            stalled_since = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            self.slow_callbacks.append({"time": time.time(), "blocked_for": round(stall, 3), "stack": stack})
+            logger.warning(f"Event loop blocked for {stall:.2f}s, stack:\n{stack}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "last_lag_ms": round(self.last_lag * 1000, 2),
+            "avg_lag_ms": round(self.total_lag / self.samples * 1000, 2) if self.samples else 0.0,
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+            "histogram_ms": {
+                (f"<={bound * 1000:g}" if i < len(LAG_BUCKETS) else f">{LAG_BUCKETS[-1] * 1000:g}"): count
+                for i, (bound, count) in enumerate(zip(LAG_BUCKETS + (None,), self.histogram))
+            },
+            "slow_callbacks": list(self.slow_callbacks)
+        }
+
+
+loop_monitor = LoopMonitor()
+_profile_lock = threading.Lock()
+
+
+def _collapse(frame, thread_name: str) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+        frame = frame.f_back
+    stack.append(thread_name)
+    return ";".join(reversed(stack))
+
+
+def sample_stacks(seconds: float, interval: float = PROFILE_INTERVAL) -> str:
+    """Сэмплирует стеки всех потоков и возвращает их в collapsed-формате для flamegraph.pl/speedscope."""
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("Profiler is already running")
+    try:
+        counts: Counter = Counter()
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    counts[_collapse(frame, names.get(thread_id, str(thread_id)))] += 1
+            time.sleep(interval)
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+    finally:
+        _profile_lock.release()
+
+
+def profiler_busy() -> bool:
+    return _profile_lock.locked()
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Sized
+
+from config.settings import CPU_POOL_SIZE, OFFLOAD_ENABLED, OFFLOAD_MIN_BYTES
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _init_worker() -> None:
+    # Импортируем тяжёлые модули заранее, чтобы первая задача не платила за импорт
+    import feedparser  # noqa: F401
+    import services.enrich  # noqa: F401
+
+
+def _ping() -> int:
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def start_pool(workers: int = CPU_POOL_SIZE) -> None:
+    global _pool
+    if not OFFLOAD_ENABLED or _pool is not None:
+        return
+    _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    # Запускаем все процессы сразу, а не при первом тяжёлом запросе
+    pids = {future.result() for future in [_pool.submit(_ping) for _ in range(workers)]}
+    logger.info(f"CPU offload pool started with {len(pids)} workers")
+
+
+def stop_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def run_cpu(func: Callable[..., Any], payload: Sized, *args: Any) -> Any:
+    """Выполняет func(payload, *args) в пуле процессов, если payload достаточно большой.
+
+    Маленькие payload дешевле обработать на месте, чем передавать между процессами.
+    func должна быть функцией уровня модуля, чтобы её можно было передать в процесс.
+    """
+    if _pool is None or len(payload) < OFFLOAD_MIN_BYTES:
+        return func(payload, *args)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_pool, func, payload, *args)
+    except BrokenProcessPool:
+        logger.error("CPU offload pool is broken, restarting it")
+        stop_pool()
+        await asyncio.to_thread(start_pool)
+        return func(payload, *args)